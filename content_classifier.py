@@ -1,6 +1,9 @@
 import os
 import re
+import math
+import json
 from collections import defaultdict
+from log_writer import log_event
 
 # 🔧 전처리: 파일명을 토큰 단위로 분석 가능하게 정제
 def preprocess_filename(name):
@@ -11,29 +14,63 @@ def preprocess_filename(name):
     name = re.sub(r'\s+', ' ', name).strip().lower()
     return name
 
+def _token_set_similarity(set_a, set_b):
+    union = len(set_a | set_b)
+    return len(set_a & set_b) / union if union else 0.0
+
 # 🔍 유사도: 자카드 유사도로 유사한 토큰 기반 비교
 def jaccard_similarity(a, b):
     set_a = set(preprocess_filename(a).split())
     set_b = set(preprocess_filename(b).split())
-    return len(set_a & set_b) / len(set_a | set_b) if set_a | set_b else 0.0
+    return _token_set_similarity(set_a, set_b)
+
+def _prefix_length(size, threshold):
+    # 자카드 >= threshold 인 두 집합은 (전역 토큰 순서 기준) 앞쪽 이만큼의 토큰 중 하나를 반드시 공유함
+    return max(0, size - math.ceil(threshold * size - 1e-9) + 1)
 
-# 🔧 그룹핑: 전처리 + 자카드 기반 그룹핑
+# 🔧 그룹핑: 전처리 + 자카드 기반 그룹핑 (토큰 역색인으로 후보만 비교)
 def group_similar_filenames(file_paths, threshold=0.5):
-    filenames = [os.path.basename(path) for path in file_paths]
-    groups = []
-    assigned = [False] * len(filenames)
+    """첫 파일부터 순서대로, 아직 묶이지 않은 뒤쪽 파일 중 자카드 유사도가 threshold 이상인
+    것들을 한 그룹으로 묶음.
+
+    토큰은 파일당 한 번만 계산하고, 드문 토큰부터 정렬한 앞부분(prefix)만 역색인에 넣어
+    토큰을 공유할 수 있는 파일끼리만 비교함 (prefix filtering). 연도나 "최종"처럼 흔한 토큰은
+    정렬 순서상 뒤로 밀려 대부분 색인되지 않으므로 포스팅 리스트가 작게 유지되고,
+    결과는 전체 쌍 비교와 동일함.
+    """
+    if threshold <= 0:
+        return [list(file_paths)] if file_paths else []
+
+    token_sets = [set(preprocess_filename(os.path.basename(path)).split()) for path in file_paths]
+    frequency = defaultdict(int)
+    for tokens in token_sets:
+        for token in tokens:
+            frequency[token] += 1
+    ordered_tokens = [sorted(tokens, key=lambda t: (frequency[t], t)) for tokens in token_sets]
+
+    inverted_index = defaultdict(list)
+    for idx, tokens in enumerate(ordered_tokens):
+        for token in tokens[:_prefix_length(len(tokens), threshold)]:
+            inverted_index[token].append(idx)
 
-    for i, fname in enumerate(filenames):
+    groups = []
+    assigned = [False] * len(file_paths)
+    for i, tokens in enumerate(ordered_tokens):
         if assigned[i]:
             continue
         group = [file_paths[i]]
         assigned[i] = True
-        for j in range(i + 1, len(filenames)):
-            if not assigned[j]:
-                score = jaccard_similarity(fname, filenames[j])
-                if score >= threshold:
-                    group.append(file_paths[j])
-                    assigned[j] = True
+        candidates = set()
+        for token in tokens[:_prefix_length(len(tokens), threshold)]:
+            candidates.update(inverted_index[token])
+        set_i = token_sets[i]
+        for j in sorted(candidates):
+            if j <= i or assigned[j]:
+                continue
+            shared = len(set_i & token_sets[j])
+            if shared and shared / (len(set_i) + len(token_sets[j]) - shared) >= threshold:
+                group.append(file_paths[j])
+                assigned[j] = True
         groups.append(group)
 
     return groups
@@ -57,23 +94,39 @@ def clean_category(raw_text):
 
     return line.strip()
 
-# ✅ 예시 추출 함수
-def extract_examples_from_log(log_file_path, max_per_category=3):
-    examples = defaultdict(list)
+def iter_log_classifications(log_file_path):
+    """로그에서 파일명 분류 결과 (파일명, 폴더명)을 차례로 내보냄.
+    JSONL 레코드(filename_classified)와 예전 "[AI 분류] 파일명 → 폴더명" 줄을 모두 읽음"""
     if not os.path.exists(log_file_path):
-        return []
-
+        return
     with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
         for line in f:
-            if '[AI \ubd84\ub958]' in line and '→' in line:
-                parts = line.strip().split('→')
+            line = line.strip()
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or record.get("event") != "filename_classified":
+                    continue
+                filename, foldername = record.get("file"), record.get("folder")
+            elif '[AI \ubd84\ub958]' in line and '→' in line:
+                parts = line.split('→')
                 if len(parts) != 2:
                     continue
                 filename = parts[0].replace('[AI \ubd84\ub958]', '').strip()
                 foldername = parts[1].strip()
-                if foldername and foldername.lower() not in ["\uae30\ud0c0", "\uc2e4\ud328", "\ubaa8른", "unknown"]:
-                    if len(examples[foldername]) < max_per_category:
-                        examples[foldername].append(filename)
+            else:
+                continue
+            if filename and foldername and foldername.lower() not in ["\uae30\ud0c0", "\uc2e4\ud328", "\ubaa8른", "unknown"]:
+                yield filename, foldername
+
+# ✅ 예시 추출 함수
+def extract_examples_from_log(log_file_path, max_per_category=3):
+    examples = defaultdict(list)
+    for filename, foldername in iter_log_classifications(log_file_path):
+        if len(examples[foldername]) < max_per_category:
+            examples[foldername].append(filename)
 
     formatted_examples = []
     for folder, files in examples.items():
@@ -117,8 +170,7 @@ def classify_by_filename_grouped(file_paths, model, silent=False, log_file=None)
             })
 
             if silent and log_file:
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(f"[파일명 그룹 분류] {os.path.basename(path)} -> {category if category else '분류 실패'}\n")
+                log_event(log_file, "filename_group_classified", file=os.path.basename(path), path=path, folder=category)
             elif not silent:
                 print(f"[파일명 그룹 분류] {os.path.basename(path)} → {category if category else '❌ 실패'}")
 
@@ -134,22 +186,58 @@ def remove_duplicate_examples(example_lines, max_examples=50):
             break
     return deduped
 
-# 📆 전체 일감 분류 방식
-def classify_filenames_bulk(file_paths, model, silent=False, log_file=None, extra_examples=None):
-    filenames = [os.path.basename(p) for p in file_paths]
-    example_lines = extract_examples_from_log(log_file) if log_file else []
-    if extra_examples:
-        example_lines.extend(extra_examples)
-    example_lines = remove_duplicate_examples(example_lines, max_examples=50)
-    example_text = '\n'.join(example_lines)
-
-    prompt = f"""
+# 📏 모델 문맥/출력 한도 (모델에서 읽지 못할 때의 기본값)
+DEFAULT_CONTEXT_TOKENS = 2048
+DEFAULT_OUTPUT_TOKENS = 256
+# 출력 한 줄("[폴더명] → ")과 파일명 사이 구분자에 드는 토큰 여유분
+GROUP_OUTPUT_OVERHEAD = 12
+NAME_OUTPUT_OVERHEAD = 2
+# 프롬프트에 넣는 "이미 사용 중인 폴더명" 목록이 차지할 수 있는 입력 토큰 비율 (넘는 폴더명은 뺌)
+KNOWN_FOLDER_BUDGET_SHARE = 0.25
+
+def count_tokens(model, text):
+    """모델 토크나이저로 토큰 수를 셈. 토크나이저를 쓸 수 없으면 UTF-8 바이트 수로 보수적으로 추정"""
+    llama = getattr(model, "model", None)
+    if llama is not None and hasattr(llama, "tokenize"):
+        try:
+            return len(llama.tokenize(text.encode("utf-8"), add_bos=False))
+        except Exception:
+            pass
+    return len(text.encode("utf-8")) // 3 + 1
+
+def get_model_limits(model):
+    """(문맥 길이, 최대 생성 토큰 수)"""
+    params = getattr(model, "params", None) or {}
+    context = params.get("nctx") or params.get("n_ctx")
+    llama = getattr(model, "model", None)
+    if not context and llama is not None and hasattr(llama, "n_ctx"):
+        try:
+            context = llama.n_ctx()
+        except Exception:
+            context = None
+    output = params.get("max_new_tokens") or DEFAULT_OUTPUT_TOKENS
+    return context or DEFAULT_CONTEXT_TOKENS, output
+
+def bulk_prompt_prefix(example_text):
+    """모든 배치가 공유하는 프롬프트 앞부분 (안내문 + 예시).
+    llama.cpp는 직전 프롬프트와 겹치는 앞부분 토큰을 다시 평가하지 않으므로 배치마다 바뀌는 내용은 이 뒤에 둠"""
+    return f"""
 아래는 예시 데이터입니다 (최근 분류 결과):
 
 {example_text if example_text else '없음'}
 
 ---
+"""
+
+def _known_folder_text(known_folders):
+    if not known_folders:
+        return ""
+    return f"""
+이미 사용 중인 폴더명 (같은 주제라면 그대로 사용하세요): {', '.join(known_folders)}
+"""
 
+def build_bulk_prompt(example_text, filenames, known_folders=None):
+    return bulk_prompt_prefix(example_text) + f"""{_known_folder_text(known_folders)}
 다음은 다양한 파일 이름들의 목록입니다. 각 파일은 특정 주제를 다룹니다:
 
 {chr(10).join(f"- {name}" for name in filenames)}
@@ -166,24 +254,112 @@ def classify_filenames_bulk(file_paths, model, silent=False, log_file=None, extr
 - 각 그룹은 공통 주제를 가져야 하며, 의미 없는 파일은 제외하거나 무시하세요.
 """
 
-    try:
-        response = model.create_completion(prompt)
-        text = response["choices"][0]["text"].strip()
-    except Exception as e:
-        print(f"❌ AI 응답 오류: {e}")
-        return [{"file_path": p, "foldername": None} for p in file_paths]
-
-    results = []
-    folder_blocks = re.findall(r'\[([^\[\]]+)\]\s*→\s*(.+)', text)
+def plan_filename_batches(file_paths, model, example_text, known_folders=None):
+    """파일 목록을 모델 문맥/출력 한도에 맞는 (배치, 프롬프트에 넣을 폴더명 목록)으로 나눔.
+
+    유사한 파일명 그룹(group_similar_filenames)은 가능한 한 같은 배치에 넣고,
+    한 그룹이 한도를 넘으면 그 그룹만 나눔. known_folders(앞 배치까지 나온 폴더명 dict)는
+    배치를 시작할 때마다 다시 읽어, 입력 예산의 KNOWN_FOLDER_BUDGET_SHARE 안에 드는 폴더명만
+    넣고 그 토큰 수를 입력 한도에서 뺌. 토큰 계산은 호출한 스레드에서만 하므로 추론 중인
+    모델을 다른 스레드에서 건드리지 않음.
+    """
+    context, output = get_model_limits(model)
+    base_tokens = count_tokens(model, build_bulk_prompt(example_text, []))
+    prompt_budget = context - output - base_tokens
+    folder_budget = int(prompt_budget * KNOWN_FOLDER_BUDGET_SHARE)
+    output_budget = output - GROUP_OUTPUT_OVERHEAD
+    folder_tokens = {}
+
+    def fit_known_folders():
+        """먼저 나온 폴더명부터 folder_budget 안에 드는 만큼 (폴더명 목록, 토큰 수)"""
+        fitted, used = [], count_tokens(model, _known_folder_text(["_"])) if known_folders else 0
+        for name in (known_folders or {}).values():
+            if name not in folder_tokens:
+                folder_tokens[name] = count_tokens(model, f"{name}, ")
+            if used + folder_tokens[name] > folder_budget:
+                break
+            fitted.append(name)
+            used += folder_tokens[name]
+        return fitted, (used if fitted else 0)
+
+    folders, folder_used = fit_known_folders()
+    batch, input_used, output_used = [], 0, 0
+    for group in group_similar_filenames(file_paths):
+        output_used += GROUP_OUTPUT_OVERHEAD
+        for path in group:
+            name_tokens = count_tokens(model, f"- {os.path.basename(path)}\n")
+            name_output = name_tokens + NAME_OUTPUT_OVERHEAD
+            if batch and (folder_used + input_used + name_tokens > prompt_budget
+                          or output_used + name_output > output_budget):
+                yield batch, folders
+                folders, folder_used = fit_known_folders()
+                batch, input_used, output_used = [], 0, GROUP_OUTPUT_OVERHEAD
+            batch.append(path)
+            input_used += name_tokens
+            output_used += name_output
+    if batch:
+        yield batch, folders
+
+def parse_bulk_response(text):
+    """"[폴더명] → 파일1, 파일2" 형식 응답을 {파일명: 폴더명}으로 변환"""
     mapping = {}
-    for foldername, files_str in folder_blocks:
-        files = [f.strip() for f in files_str.split(',')]
-        for name in files:
-            mapping[name] = foldername.strip()
+    for foldername, files_str in re.findall(r'\[([^\[\]]+)\]\s*→\s*(.+)', text):
+        for name in files_str.split(','):
+            mapping[name.strip()] = foldername.strip()
+    return mapping
+
+def _merge_foldername(foldername, known_folders):
+    """배치마다 표기가 조금씩 다른 폴더명(공백/밑줄 차이)을 처음 나온 이름으로 통일"""
+    key = re.sub(r'[\s_]', '', foldername)
+    return known_folders.setdefault(key, foldername)
 
+# 📆 전체 일감 분류 방식
+def classify_filenames_bulk(file_paths, model, silent=False, log_file=None, extra_examples=None, batched=True,
+                            example_store=None):
+    """파일명만으로 폴더를 분류.
+
+    batched=True면 모델 문맥/출력 한도에 맞춰 여러 번 나눠 호출하고, 앞 배치에서 나온 폴더명을
+    다음 배치 프롬프트에 넘겨 전체 결과가 하나의 폴더명 체계를 쓰도록 함. batched=False면 한 번에 호출.
+    example_store가 있으면 로그를 다시 읽는 대신 거기서 예시를 가져오고, 분류 결과도 기록함.
+    """
+    if example_store is not None:
+        example_lines = example_store.load_examples(max_examples=50)
+    else:
+        example_lines = extract_examples_from_log(log_file) if log_file else []
+    if extra_examples:
+        example_lines.extend(extra_examples)
+    example_lines = remove_duplicate_examples(example_lines, max_examples=50)
+    example_text = '\n'.join(example_lines)
+
+    known_folders = {}
+    folder_by_path = {}
+    if batched:
+        batches = plan_filename_batches(file_paths, model, example_text, known_folders)
+    else:
+        batches = [(list(file_paths), None)]
+
+    # 배치 구성은 이전 배치 응답을 받은 뒤 같은 스레드에서 진행 (llama.cpp 모델은 스레드 안전하지 않음)
+    for batch, folders in batches:
+        if folders is None:
+            folders = list(known_folders.values())
+        prompt = build_bulk_prompt(example_text, [os.path.basename(p) for p in batch], folders)
+        try:
+            response = model.create_completion(prompt)
+            text = response["choices"][0]["text"].strip()
+        except Exception as e:
+            print(f"❌ AI 응답 오류: {e}")
+            continue
+
+        mapping = parse_bulk_response(text)
+        for path in batch:
+            foldername = mapping.get(os.path.basename(path))
+            if foldername:
+                folder_by_path[path] = _merge_foldername(foldername, known_folders)
+
+    results = []
     for path in file_paths:
         name = os.path.basename(path)
-        foldername = mapping.get(name, None)
+        foldername = folder_by_path.get(path)
         results.append({
             "file_path": path,
             "foldername": foldername
@@ -191,7 +367,8 @@ def classify_filenames_bulk(file_paths, model, silent=False, log_file=None, extr
         if not silent:
             print(f"[AI 분류] {name} → {foldername if foldername else '❌ 실패'}")
         elif silent and log_file:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(f"[AI 분류] {name} → {foldername if foldername else '실패'}\n")
+            log_event(log_file, "filename_classified", file=name, path=path, folder=foldername)
 
+    if example_store is not None:
+        example_store.add_results(results)
     return results
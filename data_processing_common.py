@@ -1,9 +1,17 @@
 import os
 import shutil
 import re
+import errno
 import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from log_writer import log_event
+from file_scan import stat_record
 from rich.progress import Progress, TextColumn, BarColumn, TimeElapsedColumn
 
+# 다른 볼륨으로 복사해야 하는 파일만 이 개수의 스레드에서 동시에 처리
+COPY_WORKERS = 4
+MAX_PENDING_COPIES = COPY_WORKERS * 2
+
 def sanitize_filename(name, max_length=50, max_words=5):
     """Clean up and sanitize folder names."""
     name = os.path.splitext(name)[0]
@@ -17,11 +25,11 @@ def sanitize_filename(name, max_length=50, max_words=5):
     limited_name = '_'.join(limited_words)
     return limited_name[:max_length] if limited_name else '분류안됨'
 
-def process_files_by_date(file_paths, output_path, dry_run=False, silent=False, log_file=None):
-    """Organize files into year/month folders."""
+def process_files_by_date(file_paths, output_path, dry_run=False, silent=False, log_file=None, snapshot=None):
+    """Organize files into year/month folders (using the scan snapshot's mtimes when given)."""
     operations = []
     for file_path in file_paths:
-        mod_time = os.path.getmtime(file_path)
+        mod_time = stat_record(file_path, snapshot).mtime
         mod_datetime = datetime.datetime.fromtimestamp(mod_time)
         year = mod_datetime.strftime('%Y')
         month = mod_datetime.strftime('%m월')
@@ -60,8 +68,9 @@ def process_files_by_type(file_paths, output_path, dry_run=False, silent=False,
         })
     return operations
 
-def compute_operations(data_list, output_path, renamed_files, processed_files, preserve_filename=True):
-    """Create hardlink copy operation list, preserving original filenames if specified."""
+def compute_operations(data_list, output_path, renamed_files, processed_files, preserve_filename=True,
+                       link_type='hardlink'):
+    """Create an operation list (hardlink copies by default), preserving original filenames if specified."""
     operations = []
     for data in data_list:
         file_path = data['file_path']
@@ -88,7 +97,7 @@ def compute_operations(data_list, output_path, renamed_files, processed_files, p
         operation = {
             'source': file_path,
             'destination': new_file_path,
-            'link_type': 'hardlink',
+            'link_type': link_type,
             'folder_name': folder_name,
             'new_file_name': new_file_name
         }
@@ -97,29 +106,94 @@ def compute_operations(data_list, output_path, renamed_files, processed_files, p
 
     return operations
 
-def execute_operations(operations, dry_run=False, silent=False, log_file=None):
-    """Move files according to the operations."""
+def _copy_then_unlink(src, dst, keep_source):
+    shutil.copy2(src, dst)
+    if not keep_source:
+        os.unlink(src)
+
+def _relocate_fast(src, dst, link_type):
+    """같은 볼륨이면 메타데이터만 바꾸는 방식(os.link/os.replace)으로 처리하고 True 반환.
+    다른 볼륨이라 복사가 필요하면 False 반환. 대상이 이미 있으면 shutil.move처럼 덮어씀
+    (os.rename은 Windows에서 FileExistsError를 내므로 os.replace를 씀)"""
+    try:
+        if link_type == 'hardlink':
+            os.link(src, dst)
+        elif link_type == 'copy':
+            return False
+        else:
+            os.replace(src, dst)
+        return True
+    except OSError as e:
+        # EXDEV: 다른 볼륨, EPERM/ENOTSUP: 하드링크를 지원하지 않는 파일 시스템,
+        # EEXIST: 하드링크 대상이 이미 있음 (복사로 덮어씀)
+        if e.errno in (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EEXIST):
+            return False
+        raise
+
+def execute_operations(operations, dry_run=False, silent=False, log_file=None, on_done=None):
+    """Relocate files according to each operation's link_type.
+
+    'hardlink'은 os.link, 'move'는 os.rename, 'copy'는 복사로 처리함. 다른 볼륨이거나
+    하드링크를 쓸 수 없으면 복사(+ move면 원본 삭제)로 대체하며, 이 복사만 스레드 풀에서
+    최대 MAX_PENDING_COPIES개까지 동시에 진행함. 만든 폴더는 기억해 다시 만들지 않음.
+    on_done이 있으면 성공한 작업마다 on_done(op)을 호출함 (메인 스레드에서).
+    """
+    verbs = {'hardlink': 'Linked', 'copy': 'Copied'}
+    created_dirs = set()
     total = len(operations)
+
     with Progress(
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         TimeElapsedColumn(),
         transient=True
-    ) as progress:
+    ) as progress, ThreadPoolExecutor(max_workers=COPY_WORKERS) as copier:
         task = progress.add_task("Organizing Files...", total=total)
+        pending = {}
+
+        def report(op, error):
+            src, dst = op['source'], op['destination']
+            link_type = op.get('link_type', 'move')
+            if error is None:
+                msg = f"{verbs.get(link_type, 'Moved')} file from '{src}' to '{dst}'"
+            else:
+                msg = f"Error relocating file from '{src}' to '{dst}': {error}"
+            if not silent:
+                print(msg)
+            elif log_file:
+                log_event(log_file, "move", source=src, destination=dst, link_type=link_type,
+                          status="error" if error else "ok", error=str(error) if error else None)
+            if error is None and on_done is not None and not dry_run:
+                on_done(op)
+            progress.advance(task)
+
+        def collect(done):
+            for future in done:
+                op = pending.pop(future)
+                error = future.exception()
+                report(op, error)
+
         for op in operations:
             src = op['source']
             dst = op['destination']
-            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            link_type = op.get('link_type', 'move')
+            if dry_run:
+                report(op, None)
+                continue
             try:
-                if not dry_run:
-                    shutil.move(src, dst)
-                msg = f"Moved file from '{src}' to '{dst}'"
+                dir_path = os.path.dirname(dst)
+                if dir_path not in created_dirs:
+                    os.makedirs(dir_path, exist_ok=True)
+                    created_dirs.add(dir_path)
+                if _relocate_fast(src, dst, link_type):
+                    report(op, None)
+                    continue
             except Exception as e:
-                msg = f"Error moving file from '{src}' to '{dst}': {e}"
-            if not silent:
-                print(msg)
-            elif log_file:
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(msg + '\n')
-            progress.advance(task)
+                report(op, e)
+                continue
+            if len(pending) >= MAX_PENDING_COPIES:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = copier.submit(_copy_then_unlink, src, dst, link_type != 'move')
+            pending[future] = op
+        collect(wait(pending).done)
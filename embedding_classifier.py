@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import hashlib
+import importlib.util
+from hash_cache import CACHE_DIR
+from file_scan import iter_scan
+from content_classifier import preprocess_filename
+
+# ✅ CPU에서 돌아가는 작은 다국어 문장 임베딩 모델 (sentence-transformers가 설치된 경우에만 사용)
+DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_EMBEDDING_DB_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite3")
+# 가장 가까운 폴더와의 코사인 유사도가 이 값 이상이고 두 번째 폴더보다 MARGIN 이상 높을 때만 바로 배정
+CONFIDENCE_THRESHOLD = 0.75
+CONFIDENCE_MARGIN = 0.05
+# 예시가 이보다 적은 폴더의 중심은 믿지 않음
+MIN_FOLDER_EXAMPLES = 2
+# 내용 임베딩에 쓰는 추출 텍스트 앞부분 길이
+CONTENT_SNIPPET_CHARS = 1000
+ENCODE_BATCH_SIZE = 64
+# 추출된 문서를 이만큼 모아서 내용 임베딩을 한 번에 계산함
+CONTENT_ROUTE_BATCH = 16
+# 파일명 임베딩과 (파일명 + 본문 앞부분) 임베딩은 분포가 달라 폴더 중심을 따로 둠
+FILENAME_KIND = "filename"
+CONTENT_KIND = "content"
+
+def embeddings_available():
+    return all(importlib.util.find_spec(name) is not None for name in ("numpy", "sentence_transformers"))
+
+def filename_text(path):
+    return preprocess_filename(os.path.basename(path))
+
+def content_text(path, text):
+    return f"{filename_text(path)}\n{text[:CONTENT_SNIPPET_CHARS]}"
+
+class EmbeddingClassifier:
+    """과거 배정 결과로 만든 폴더별 임베딩 중심(centroid)과의 코사인 유사도로 폴더를 고르는 분류기.
+
+    확신할 수 있는 파일만 LLM 없이 바로 배정하고 나머지는 호출한 쪽에서 LLM으로 넘기면 됨.
+    임베딩은 입력 문자열의 해시로 SQLite에 저장해 같은 파일명/내용은 다시 계산하지 않고,
+    폴더 중심은 종류(kind: 파일명/내용)별로 (벡터 합, 개수)를 저장해 배정 결과가 생길 때마다 갱신함.
+    중심은 LLM 배정이나 정리된 출력 폴더처럼 분류기 밖에서 정해진 결과로만 갱신해야 함
+    (자기 배정으로 학습하면 틀린 배정이 중심을 끌어당겨 계속 강화됨).
+    encoder를 주면 SentenceTransformer 대신 그것(encode/get_sentence_embedding_dimension)을 씀.
+    allow_download가 False면 로컬 캐시에 있는 모델만 쓰고, 없으면 내려받지 않고 OSError를 냄.
+    """
+
+    def __init__(self, model_name=DEFAULT_EMBEDDING_MODEL, db_path=DEFAULT_EMBEDDING_DB_PATH,
+                 threshold=CONFIDENCE_THRESHOLD, margin=CONFIDENCE_MARGIN, encoder=None,
+                 allow_download=False):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.model_name = model_name
+        self.threshold = threshold
+        self.margin = margin
+        if encoder is None:
+            from sentence_transformers import SentenceTransformer
+            encoder = SentenceTransformer(model_name, device="cpu", local_files_only=not allow_download)
+        self.encoder = encoder
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS centroids (
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                vector_sum BLOB NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (model, kind, folder)
+            );
+        """)
+        self.conn.commit()
+        self._matrices = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed(self, texts):
+        """정규화된 임베딩 행렬 (len(texts) × 차원). 캐시에 없는 문자열만 한 번에 인코딩함"""
+        import numpy as np
+        keys = [self._key(text) for text in texts]
+        vectors = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, blob in self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ):
+                vectors[key] = np.frombuffer(blob, dtype=np.float32)
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                misses.setdefault(key, text)
+        if misses:
+            encoded = self.encoder.encode(
+                list(misses.values()), batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True,
+                convert_to_numpy=True, show_progress_bar=False,
+            ).astype(np.float32)
+            for key, vector in zip(misses, encoded):
+                vectors[key] = vector
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in zip(misses, encoded)],
+            )
+            self.conn.commit()
+        if not keys:
+            return np.zeros((0, self.encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack([vectors[key] for key in keys])
+
+    def _centroids(self, kind):
+        """(폴더명 목록, 정규화된 중심 행렬). 예시가 MIN_FOLDER_EXAMPLES개 이상인 폴더만 포함"""
+        if kind not in self._matrices:
+            import numpy as np
+            folders, rows = [], []
+            for folder, blob, count in self.conn.execute(
+                "SELECT folder, vector_sum, count FROM centroids WHERE model = ? AND kind = ? AND count >= ?",
+                (self.model_name, kind, MIN_FOLDER_EXAMPLES),
+            ):
+                vector = np.frombuffer(blob, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    folders.append(folder)
+                    rows.append(vector / norm)
+            self._matrices[kind] = (folders, np.vstack(rows) if rows else None)
+        return self._matrices[kind]
+
+    def learn(self, folders, texts, kind=FILENAME_KIND):
+        """배정 결과(폴더명, 임베딩할 문자열)를 kind 종류의 폴더 중심에 더함"""
+        import numpy as np
+        pairs = [(folder, text) for folder, text in zip(folders, texts) if folder]
+        if not pairs:
+            return
+        vectors = self.embed([text for _, text in pairs])
+        sums = {}
+        for (folder, _), vector in zip(pairs, vectors):
+            total, count = sums.get(folder, (0, 0))
+            sums[folder] = (total + vector, count + 1)
+        for folder, (total, count) in sums.items():
+            row = self.conn.execute(
+                "SELECT vector_sum, count FROM centroids WHERE model = ? AND kind = ? AND folder = ?",
+                (self.model_name, kind, folder),
+            ).fetchone()
+            if row is not None:
+                total = total + np.frombuffer(row[0], dtype=np.float32)
+                count += row[1]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO centroids (model, kind, folder, vector_sum, count) VALUES (?, ?, ?, ?, ?)",
+                (self.model_name, kind, folder, total.astype(np.float32).tobytes(), count),
+            )
+        self.conn.commit()
+        self._matrices.pop(kind, None)
+
+    def classify(self, texts, kind=FILENAME_KIND):
+        """문자열마다 (폴더명 또는 None, 유사도). 확신 기준을 넘지 못하면 폴더명은 None"""
+        import numpy as np
+        folders, matrix = self._centroids(kind)
+        if matrix is None or not texts:
+            return [(None, 0.0)] * len(texts)
+        similarities = self.embed(texts) @ matrix.T
+        if len(folders) > 1:
+            top_two = np.partition(similarities, -2, axis=1)[:, -2:]
+            second = top_two.min(axis=1)
+        else:
+            second = np.full(len(texts), -1.0)
+        best_index = similarities.argmax(axis=1)
+        best = similarities[np.arange(len(texts)), best_index]
+        results = []
+        for index, score, runner_up in zip(best_index, best, second):
+            confident = score >= self.threshold and score - runner_up >= self.margin
+            results.append((folders[index] if confident else None, float(score)))
+        return results
+
+    def seed_from_output(self, output_path):
+        """폴더 중심이 하나도 없으면 이미 정리된 출력 폴더(출력/연도/분기/폴더명/파일)의 파일명으로 만듦"""
+        if self.conn.execute(
+            "SELECT 1 FROM centroids WHERE model = ? AND kind = ? LIMIT 1", (self.model_name, FILENAME_KIND)
+        ).fetchone():
+            return
+        folders, texts = [], []
+        for record in iter_scan(output_path, max_depth=3):
+            rel_parts = os.path.relpath(os.path.dirname(record.path), output_path).split(os.sep)
+            if len(rel_parts) == 3 and not record.hidden:
+                folders.append(rel_parts[2])
+                texts.append(filename_text(record.path))
+        self.learn(folders, texts, FILENAME_KIND)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
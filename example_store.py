@@ -0,0 +1,93 @@
+import os
+import sqlite3
+from hash_cache import CACHE_DIR
+from content_classifier import iter_log_classifications
+
+DEFAULT_EXAMPLE_STORE_PATH = os.path.join(CACHE_DIR, "examples.sqlite3")
+MAX_PER_CATEGORY = 3
+INVALID_FOLDERS = ["기타", "실패", "모른", "unknown"]
+
+class ExampleStore:
+    """few-shot 예시(폴더명 → 파일명)를 폴더당 최대 max_per_category개만 보관하는 SQLite 저장소.
+
+    분류할 때마다 기록하므로 실행 로그를 매번 처음부터 읽지 않아도 되고, 읽기 비용은
+    로그 크기와 무관하게 (폴더 수 상한 × 폴더당 예시 수)로 고정됨. 처음 만들 때 한 번만
+    기존 로그에서 예시를 가져옴. 예시 블록은 프롬프트 앞부분(모델 KV 재사용, 응답 캐시 키)이므로
+    이미 있는 예시는 바꾸지 않고 자리가 있을 때만 채우며, 순서도 저장 내용으로만 정해짐.
+    """
+
+    def __init__(self, db_path=DEFAULT_EXAMPLE_STORE_PATH, max_per_category=MAX_PER_CATEGORY, log_file=None):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.max_per_category = max_per_category
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS examples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                folder TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                UNIQUE(folder, filename)
+            );
+            CREATE INDEX IF NOT EXISTS idx_examples_folder ON examples(folder, id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.conn.commit()
+        if log_file:
+            self._import_log_once(log_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _import_log_once(self, log_file):
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'log_imported'").fetchone():
+            return
+        for filename, folder in iter_log_classifications(log_file):
+            self._add(folder, filename)
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('log_imported', ?)", (log_file,))
+        self.conn.commit()
+
+    def _add(self, folder, filename):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO examples (folder, filename) SELECT ?, ? "
+            "WHERE (SELECT COUNT(*) FROM examples WHERE folder = ?) < ?",
+            (folder, filename, folder, self.max_per_category),
+        )
+
+    def add(self, folder, filename):
+        """분류 결과 하나를 예시로 기록 (폴더당 처음 들어온 max_per_category개만 유지)"""
+        folder = folder.strip() if folder else ""
+        if not folder or folder.lower() in INVALID_FOLDERS:
+            return
+        self._add(folder, filename)
+
+    def add_results(self, results):
+        for item in results:
+            if item.get("foldername"):
+                self.add(item["foldername"], os.path.basename(item["file_path"]))
+        self.conn.commit()
+
+    def load_examples(self, max_examples=50):
+        """먼저 기록된 폴더 max_examples개를 폴더명 순으로 "[폴더명] → 파일1, 파일2" 형식의 줄로 반환.
+        예시가 새로 추가되지 않는 한 실행/배치가 달라도 같은 결과를 돌려줌"""
+        folders = self.conn.execute(
+            "SELECT folder FROM (SELECT folder, MIN(id) AS first_id FROM examples GROUP BY folder "
+            "ORDER BY first_id LIMIT ?) ORDER BY folder", (max_examples,)
+        ).fetchall()
+        lines = []
+        for (folder,) in folders:
+            files = [name for (name,) in self.conn.execute(
+                "SELECT filename FROM examples WHERE folder = ? ORDER BY id", (folder,)
+            )]
+            lines.append(f"[{folder}] → {', '.join(files)}")
+        return lines
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
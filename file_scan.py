@@ -0,0 +1,145 @@
+import os
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 디렉터리 목록 조회는 I/O 대기가 대부분이라(특히 SMB/NFS) CPU 수보다 많은 스레드를 씀
+DEFAULT_SCAN_WORKERS = 16
+# 동시에 조회 중인 디렉터리 수 상한 = 작업자 수 × 이 값
+SCAN_QUEUE_FACTOR = 2
+
+class FileRecord:
+    """스캔한 파일 하나의 stat 정보. 수백만 개를 들고 있어도 가볍도록 __slots__만 사용함.
+    st_size/st_mtime_ns/st_ino 이름으로도 읽을 수 있어 os.stat 결과 대신 HashCache에 넘길 수 있음"""
+
+    __slots__ = ("path", "size", "mtime", "mtime_ns", "ctime", "inode", "ext")
+
+    def __init__(self, path, size, mtime, mtime_ns, ctime, inode):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.mtime_ns = mtime_ns
+        self.ctime = ctime
+        self.inode = inode
+        self.ext = os.path.splitext(path)[1].lower()
+
+    @classmethod
+    def from_stat(cls, path, st):
+        return cls(path, st.st_size, st.st_mtime, st.st_mtime_ns, st.st_ctime, st.st_ino)
+
+    @property
+    def st_size(self):
+        return self.size
+
+    @property
+    def st_mtime_ns(self):
+        return self.mtime_ns
+
+    @property
+    def st_ino(self):
+        return self.inode
+
+    @property
+    def hidden(self):
+        return os.path.basename(self.path).startswith('.')
+
+class ScanSnapshot:
+    """한 번의 디렉터리 스캔 결과 {경로: FileRecord}. 실행 중 모든 단계가 이 스냅샷을 공유해
+    파일마다 목록 조회와 stat이 한 번씩만 일어나게 함. 단계가 파일을 옮기면 discard로 빼 둠"""
+
+    def __init__(self, records=()):
+        self.records = {record.path: record for record in records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, path):
+        return path in self.records
+
+    def get(self, path):
+        return self.records.get(path)
+
+    def paths(self, include_hidden=False):
+        """경로 목록 (정렬됨). 병렬 스캔 순서는 매번 달라지므로, 그대로 쓰면 그룹/배치/프롬프트가
+        실행마다 바뀌어 LLM 응답 캐시가 맞지 않음"""
+        return sorted(record.path for record in self.records.values() if include_hidden or not record.hidden)
+
+    def discard(self, path):
+        self.records.pop(path, None)
+
+    def stat(self, path):
+        """스냅샷에 있으면 그 기록을, 없으면(스캔 이후 생긴 파일) os.stat으로 만든 기록을 반환"""
+        record = self.records.get(path)
+        if record is None:
+            record = FileRecord.from_stat(path, os.stat(path))
+        return record
+
+def stat_record(path, snapshot=None):
+    if snapshot is not None:
+        return snapshot.stat(path)
+    return FileRecord.from_stat(path, os.stat(path))
+
+def _is_excluded(path, prefix_len, patterns):
+    """이름이나 기준 폴더로부터의 상대 경로(/ 구분)가 제외 패턴 중 하나와 맞으면 True"""
+    name = os.path.basename(path)
+    rel_path = path[prefix_len:].replace(os.sep, '/')
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern) for pattern in patterns)
+
+def _scan_entries(directory, prefix_len, exclude):
+    """directory 바로 아래의 (파일 기록 목록, 하위 디렉터리 목록). 읽을 수 없으면 둘 다 빈 목록"""
+    records = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if exclude and _is_excluded(entry.path, prefix_len, exclude):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        # entry.inode()는 Windows에서 stat을 한 번 더 하므로 stat 결과의 st_ino를 씀
+                        records.append(FileRecord.from_stat(entry.path, entry.stat()))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return records, subdirs
+
+def iter_scan(base_path, workers=DEFAULT_SCAN_WORKERS, exclude=None, max_depth=None):
+    """base_path 아래 파일의 FileRecord를 디렉터리 하나를 다 읽을 때마다 내보냄 (순서는 보장하지 않음).
+
+    하위 디렉터리 목록 조회를 workers개 스레드에서 동시에 진행하되, 조회 중인 디렉터리는
+    workers × SCAN_QUEUE_FACTOR개까지만 두고 나머지는 대기열(LIFO라 깊이 우선으로 소진되어
+    트리 폭만큼 커지지 않음)에 둠. exclude는 이름이나 상대 경로에 맞출 glob 패턴 목록으로,
+    맞는 디렉터리는 아예 내려가지 않음. max_depth=0이면 base_path 바로 아래 파일만 읽음.
+    """
+    exclude = list(exclude or [])
+    prefix_len = len(os.path.join(base_path, ''))
+    max_pending = max(1, workers) * SCAN_QUEUE_FACTOR
+    frontier = [(base_path, 0)]
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scan")
+    try:
+        while frontier or pending:
+            while frontier and len(pending) < max_pending:
+                directory, depth = frontier.pop()
+                pending[executor.submit(_scan_entries, directory, prefix_len, exclude)] = depth
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                records, subdirs = future.result()
+                if max_depth is None or depth < max_depth:
+                    frontier.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+                yield from records
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def scan_directory(base_path, workers=DEFAULT_SCAN_WORKERS, exclude=None, max_depth=None):
+    """base_path 아래 모든 파일을 한 번 훑어 ScanSnapshot으로 반환 (숨김 파일 포함, 옵션은 iter_scan 참고).
+    base_path가 파일이면 그 파일 하나만 담음"""
+    if os.path.isfile(base_path):
+        return ScanSnapshot([FileRecord.from_stat(base_path, os.stat(base_path))])
+    return ScanSnapshot(iter_scan(base_path, workers=workers, exclude=exclude, max_depth=max_depth))
@@ -1,88 +1,94 @@
 import os
 import re
+import time
+import queue
 import shutil
-from PIL import Image
-import pytesseract
-import fitz  # PyMuPDF
-import docx
-import pandas as pd  # Import pandas to read Excel and CSV files
-from pptx import Presentation  # Import Presentation for PPT files
+import functools
+import itertools
+import multiprocessing
+from collections import deque
+from text_extraction import extract_text
+from file_scan import iter_scan, DEFAULT_SCAN_WORKERS
 
-# ✅ Windows용 Tesseract 경로 설정 (이미 메인에서 설정되어 있으면 생략 가능)
-# pytesseract.pytesseract.tesseract_cmd = r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
+# 요약/분류 프롬프트에 쓰는 앞부분만 읽음 (파일 크기와 무관하게 메모리 사용량 고정)
+READ_CHAR_BUDGET = 3000
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+# read_file_data가 읽는 문서 형식 (text_extraction은 .html/.json 등도 읽지만 분류 대상은 이것뿐)
+READ_EXTENSIONS = ('.txt', '.md', '.docx', '.doc', '.pdf', '.xls', '.xlsx', '.csv', '.ppt', '.pptx')
 
-def read_text_file(file_path):
-    """Read text content from a text file."""
-    max_chars = 3000
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            text = file.read(max_chars)
-        return text
-    except Exception as e:
-        print(f"Error reading text file {file_path}: {e}")
+def read_file_data(file_path, max_chars=READ_CHAR_BUDGET):
+    """파일 확장자에 따라 내용을 읽어옴 (hwp는 무시). 추출은 text_extraction 공용 캐시를 거침"""
+    ext = os.path.splitext(file_path.lower())[1]
+    if ext == '.hwp':
+        print(f"⚠️ HWP 파일 무시: {file_path}")
         return None
-
-def read_docx_file(file_path):
-    """Read text content from a .docx or .doc file."""
-    try:
-        doc = docx.Document(file_path)
-        full_text = [para.text for para in doc.paragraphs]
-        return '\n'.join(full_text)
-    except Exception as e:
-        print(f"Error reading DOCX file {file_path}: {e}")
+    if ext not in READ_EXTENSIONS:
         return None
+    return extract_text(file_path, max_chars=max_chars) or None
 
-def read_pdf_file(file_path):
-    """Read text content from a PDF file."""
-    try:
-        doc = fitz.open(file_path)
-        full_text = [doc.load_page(i).get_text() for i in range(min(3, len(doc)))]
-        return '\n'.join(full_text)
-    except Exception as e:
-        print(f"Error reading PDF file {file_path}: {e}")
-        return None
+def _report_result(done, task_id, value):
+    done.put((task_id, value))
 
-def read_spreadsheet_file(file_path):
-    """Read text content from an Excel or CSV file."""
-    try:
-        if file_path.lower().endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
-        return df.to_string()
-    except Exception as e:
-        print(f"Error reading spreadsheet file {file_path}: {e}")
-        return None
+def _report_error(done, task_id, path, error):
+    print(f"Error reading file {path}: {error}")
+    done.put((task_id, None))
 
-def read_ppt_file(file_path):
-    """Read text content from a PowerPoint file."""
-    try:
-        prs = Presentation(file_path)
-        return '\n'.join(
-            shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")
-        )
-    except Exception as e:
-        print(f"Error reading PowerPoint file {file_path}: {e}")
-        return None
+def iter_read_files_parallel(file_paths, reader=read_file_data, workers=None,
+                             timeout=DEFAULT_READ_TIMEOUT, max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD):
+    """reader(path)를 프로세스 풀에서 실행하고 끝나는 순서대로 (경로, 결과)를 내보냄.
 
-def read_file_data(file_path):
-    """파일 확장자에 따라 내용을 읽어옴 (hwp는 무시)"""
-    ext = os.path.splitext(file_path.lower())[1]
-    if ext in ['.txt', '.md']:
-        return read_text_file(file_path)
-    elif ext in ['.docx', '.doc']:
-        return read_docx_file(file_path)
-    elif ext == '.pdf':
-        return read_pdf_file(file_path)
-    elif ext in ['.xls', '.xlsx', '.csv']:
-        return read_spreadsheet_file(file_path)
-    elif ext in ['.ppt', '.pptx']:
-        return read_ppt_file(file_path)
-    elif ext == '.hwp':
-        print(f"⚠️ HWP 파일 무시: {file_path}")
-        return None
-    else:
-        return None
+    동시에 보내는 작업은 작업자 수만큼으로 제한해 각 작업이 바로 시작되게 하고, timeout초 안에
+    끝나지 않은 파일은 결과 None으로 내보낸 뒤 풀을 통째로 재시작함 (나머지 진행 중 작업은 다시
+    보냄). 작업자는 max_tasks_per_child개를 처리하면 새 프로세스로 교체되어 파서의 메모리 누수가
+    쌓이지 않음. reader는 피클 가능한 최상위 함수여야 함.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = deque(file_paths)
+    in_flight = {}
+    done = queue.Queue()
+    task_ids = itertools.count()
+    pool = None
+    try:
+        while pending or in_flight:
+            if pool is None:
+                pool = multiprocessing.Pool(workers, maxtasksperchild=max_tasks_per_child)
+            while pending and len(in_flight) < workers:
+                path = pending.popleft()
+                task_id = next(task_ids)
+                in_flight[task_id] = (path, time.monotonic() + timeout)
+                pool.apply_async(
+                    reader, (path,),
+                    callback=functools.partial(_report_result, done, task_id),
+                    error_callback=functools.partial(_report_error, done, task_id, path),
+                )
+            wait = min(deadline for _, deadline in in_flight.values()) - time.monotonic()
+            try:
+                task_id, value = done.get(timeout=max(0.0, wait))
+            except queue.Empty:
+                now = time.monotonic()
+                expired = [tid for tid, (_, deadline) in in_flight.items() if deadline <= now]
+                if not expired:
+                    continue
+                pool.terminate()
+                pool.join()
+                pool = None
+                for tid in expired:
+                    path, _ = in_flight.pop(tid)
+                    print(f"⏱️ 읽기 시간 초과 ({timeout}초): {path}")
+                    yield path, None
+                # 같이 죽은 나머지 작업은 다시 보냄 (이전 작업 번호의 늦은 결과는 무시됨)
+                pending.extendleft(path for path, _ in reversed(list(in_flight.values())))
+                in_flight.clear()
+                continue
+            if task_id not in in_flight:
+                continue
+            path, _ = in_flight.pop(task_id)
+            yield path, value
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
 
 def display_directory_tree(path):
     """Display the directory tree in a format similar to the 'tree' command, including the full path."""
@@ -101,16 +107,13 @@ def display_directory_tree(path):
     else:
         print(os.path.abspath(path))
 
-def collect_file_paths(base_path):
-    """Collect all file paths from the base directory or single file, excluding hidden files."""
+def collect_file_paths(base_path, workers=DEFAULT_SCAN_WORKERS, exclude=None, max_depth=None):
+    """Collect all file paths from the base directory or single file, excluding hidden files.
+    Directories are listed concurrently; see file_scan.iter_scan for exclude/max_depth."""
     if os.path.isfile(base_path):
         return [base_path]
-    file_paths = []
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if not file.startswith('.'):
-                file_paths.append(os.path.join(root, file))
-    return file_paths
+    return sorted(record.path for record in iter_scan(base_path, workers=workers, exclude=exclude, max_depth=max_depth)
+                  if not record.hidden)
 
 def separate_files_by_type(file_paths):
     """Separate files into images and text files based on their extensions."""
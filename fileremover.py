@@ -1,31 +1,93 @@
 import os
 import shutil
-import hashlib
 import difflib
-from datetime import datetime
+import hashlib
 from collections import defaultdict, deque
-from docx import Document
-import pdfplumber
-import openpyxl
-from pptx import Presentation
-from bs4 import BeautifulSoup
-import json
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from hash_cache import HashCache, DEFAULT_HASH_CACHE_PATH, DEFAULT_MAX_ENTRIES, file_sha256
+from file_scan import scan_directory, stat_record
+from text_extraction import extract_text, SUPPORTED_EXTENSIONS
+from file_utils import iter_read_files_parallel, DEFAULT_READ_TIMEOUT
+from legacy_converter import convert_legacy_files, is_legacy_office_file
+from near_duplicate import MAX_SHINGLE_CHARS, LSHIndex, minhash_signature, serialize_signature, deserialize_signature
 
 CANDIDATE_DIR = r"C:\Users\wnsgh\Desktop\삭제후보"
 GUBOJEON_DIR = os.path.join(CANDIDATE_DIR, "구버전")
 DUPLICATE_DIR = os.path.join(CANDIDATE_DIR, "중복파일")
 
+PARTIAL_HASH_BLOCK = 64 * 1024
+HASH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+# 구버전 판정 기준: 추출 텍스트의 SequenceMatcher 유사도 (MinHash 도입 전과 같은 0.85).
+# MinHash/LSH 버킷과 파일명 그룹은 이 비교를 할 후보쌍만 고름
+CONTENT_SIMILARITY_THRESHOLD = 0.85
+
 def calculate_file_hash(file_path):
+    try:
+        return file_sha256(file_path)
+    except Exception as e:
+        print(f"Error hashing {file_path}: {e}")
+        return None
+
+def calculate_partial_hash(file_path, size, block_size=PARTIAL_HASH_BLOCK):
+    """파일의 앞/뒤 블록만 해시 (크기가 같은 파일끼리 빠르게 걸러내기 위함)"""
     sha256 = hashlib.sha256()
     try:
         with open(file_path, "rb") as f:
-            sha256.update(f.read())
+            sha256.update(f.read(block_size))
+            if size > block_size:
+                f.seek(max(block_size, size - block_size))
+                sha256.update(f.read(block_size))
         return sha256.hexdigest()
     except Exception as e:
         print(f"Error hashing {file_path}: {e}")
         return None
 
+def _hash_buckets(buckets, hash_func, field, stats, max_workers, cache=None):
+    """버킷별로 파일을 해시해서 (기존 키, 해시) 기준으로 다시 나눔. 단일 파일 버킷은 버림"""
+    candidates = [(key, path) for key, paths in buckets.items() if len(paths) > 1 for path in paths]
+    digests = {}
+    if cache is not None:
+        for _, path in candidates:
+            cached = cache.lookup(path, stats[path], field)
+            if cached:
+                digests[path] = cached
+    misses = [(key, path) for key, path in candidates if path not in digests]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        computed = executor.map(lambda item: hash_func(item[1], item[0][0]), misses)
+        for (_, path), digest in zip(misses, computed):
+            if digest:
+                digests[path] = digest
+                if cache is not None:
+                    cache.store(path, stats[path], **{field: digest})
+    refined = defaultdict(list)
+    for key, path in candidates:
+        if path in digests:
+            refined[key + (digests[path],)].append(path)
+    return {key: paths for key, paths in refined.items() if len(paths) > 1}
+
+def find_duplicate_groups(file_paths, max_workers=HASH_WORKERS, cache=None, snapshot=None):
+    """크기 → 부분 해시 → 전체 해시 순으로 좁혀가며 내용이 같은 파일 그룹을 찾음.
+    snapshot이 있으면 파일 크기 등은 다시 stat하지 않고 스캔 기록을 씀"""
+    stats = {}
+    size_buckets = defaultdict(list)
+    for path in file_paths:
+        try:
+            stats[path] = stat_record(path, snapshot)
+        except OSError as e:
+            print(f"Error reading size of {path}: {e}")
+            continue
+        size_buckets[(stats[path].st_size,)].append(path)
+    partial_buckets = _hash_buckets(size_buckets, calculate_partial_hash, "partial_hash", stats, max_workers, cache)
+    # 앞/뒤 블록이 파일 전체를 덮는 작은 파일은 부분 해시로 충분함
+    small = {key: paths for key, paths in partial_buckets.items() if key[0] <= 2 * PARTIAL_HASH_BLOCK}
+    large = {key: paths for key, paths in partial_buckets.items() if key[0] > 2 * PARTIAL_HASH_BLOCK}
+    full_buckets = _hash_buckets(
+        large, lambda path, _size: calculate_file_hash(path), "sha256", stats, max_workers, cache
+    )
+    if cache is not None:
+        cache.commit()
+    return list(small.values()) + list(full_buckets.values())
+
 def move_to_category(file_path, category, reason=""):
     category_dir = os.path.join(CANDIDATE_DIR, category)
     os.makedirs(category_dir, exist_ok=True)
@@ -47,74 +109,6 @@ def simplify_filename(filename):
         name = name.replace(keyword, "")
     return name.strip().replace("_", "").replace(" ", "")
 
-def convert_with_libreoffice(path):
-    try:
-        output_dir = os.path.dirname(path)
-        subprocess.run([
-            'soffice', '--headless', '--convert-to', 'docx', '--outdir', output_dir, path
-        ], check=True)
-        new_path = os.path.splitext(path)[0] + '.docx'
-        if os.path.exists(new_path):
-            return extract_text(new_path)
-    except:
-        return ""
-    return ""
-
-def extract_text(path):
-    ext = os.path.splitext(path)[1].lower()
-    try:
-        if ext == ".docx":
-            doc = Document(path)
-            return "\n".join([p.text for p in doc.paragraphs])
-        elif ext in [".txt", ".md", ".csv"]:
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
-        elif ext == ".pdf":
-            text = ""
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-            return text
-        elif ext == ".xlsx":
-            wb = openpyxl.load_workbook(path, data_only=True)
-            text = ""
-            for sheet in wb.worksheets:
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.value:
-                            text += str(cell.value) + "\n"
-            return text
-        elif ext == ".pptx":
-            prs = Presentation(path)
-            text = ""
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
-            return text
-        elif ext == ".html":
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                soup = BeautifulSoup(f, "html.parser")
-                return soup.get_text()
-        elif ext == ".json":
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                data = json.load(f)
-                return json.dumps(data, indent=2)
-        elif ext in [".doc", ".ppt", ".xls"]:
-            return convert_with_libreoffice(path)
-    except:
-        return ""
-    return ""
-
-def is_content_similar(file1, file2, threshold=0.85):
-    try:
-        text1 = extract_text(file1)
-        text2 = extract_text(file2)
-        similarity = difflib.SequenceMatcher(None, text1, text2).ratio()
-        return similarity >= threshold
-    except:
-        return False
-
 def build_similarity_clusters(similarity_groups):
     visited = set()
     clusters = []
@@ -134,54 +128,126 @@ def build_similarity_clusters(similarity_groups):
             clusters.append(cluster)
     return clusters
 
-def isolate_all(directory):
-    print(f"\n📌 전체 폴더 기반 중복 및 구버전 정리 시작: {directory}\n")
-    file_paths = []
-    file_hashes = defaultdict(list)
-    file_groups = defaultdict(list)
-    duplicate_hashes = set()
-    for root, _, files in os.walk(directory):
-        for file in files:
-            path = os.path.join(root, file)
-            if not os.path.isfile(path):
-                continue
-            file_paths.append(path)
-            file_hash = calculate_file_hash(path)
-            if file_hash:
-                file_hashes[file_hash].append(path)
-    for hash_value, hash_group in file_hashes.items():
-        if len(hash_group) <= 1:
+def is_text_similar(text1, text2, threshold=CONTENT_SIMILARITY_THRESHOLD):
+    """SequenceMatcher 유사도가 threshold 이상인지. 값싼 상한(real_quick_ratio/quick_ratio)으로 먼저 거름"""
+    matcher = difflib.SequenceMatcher(None, text1, text2)
+    return (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
+def text_signature(path):
+    """추출한 텍스트의 직렬화된 MinHash 서명 (텍스트가 없으면 빈 문자열). 프로세스 풀에서 실행됨"""
+    signature = minhash_signature(extract_text(path, max_chars=MAX_SHINGLE_CHARS) or "")
+    return serialize_signature(signature) if signature else ""
+
+def content_signatures(file_paths, cache=None, workers=None, timeout=DEFAULT_READ_TIMEOUT, snapshot=None):
+    """{경로: MinHash 서명 또는 None(텍스트 없음)}. 캐시에 없는 파일만 프로세스 풀에서 추출/계산함.
+    추출 백엔드가 없는 형식은 풀에 보내지 않고 바로 None. 시간 초과나 오류로 서명을 못 구한
+    파일은 결과에서 빠지며 캐시에도 기록하지 않음"""
+    signatures = {}
+    stats = {}
+    misses = []
+    for path in file_paths:
+        if os.path.splitext(path)[1].lower() not in SUPPORTED_EXTENSIONS:
+            signatures[path] = None
+            continue
+        try:
+            stats[path] = stat_record(path, snapshot)
+        except OSError as e:
+            print(f"Error reading {path}: {e}")
             continue
-        duplicate_hashes.update(hash_group)
-        latest = max(hash_group, key=lambda x: os.path.getmtime(x))
-        for f in hash_group:
-            if f != latest:
-                move_to_category(f, "중복파일", reason="전체 검사 기반 중복파일 정리")
+        cached = cache.lookup(path, stats[path], "text_fingerprint") if cache is not None else None
+        if cached is not None:
+            signatures[path] = deserialize_signature(cached) if cached else None
+        else:
+            misses.append(path)
+    if misses:
+        for path, serialized in iter_read_files_parallel(misses, reader=text_signature, workers=workers, timeout=timeout):
+            if serialized is None:
+                continue
+            signatures[path] = deserialize_signature(serialized) if serialized else None
+            if cache is not None:
+                cache.store(path, stats[path], text_fingerprint=serialized)
+    return signatures
+
+def build_content_similarity_graph(file_paths, cache=None, threshold=CONTENT_SIMILARITY_THRESHOLD, snapshot=None):
+    """내용이 비슷한 파일끼리 연결한 그래프를 만듦.
+
+    비교할 후보쌍은 MinHash/LSH 버킷을 공유한 쌍(이름을 바꾼 사본)과 기존처럼 simplify_filename이
+    같은 쌍이고, 각 후보는 추출 텍스트의 SequenceMatcher 유사도(is_text_similar)로 확인한 뒤에만 연결함.
+    텍스트를 추출할 수 없는 파일은 기존처럼 simplify_filename이 같은 파일끼리만 묶음.
+    """
+    index = LSHIndex()
+    textless_groups = defaultdict(list)
+    # 지문이 캐시에 없는 구형 오피스 파일은 soffice 한 번으로 미리 일괄 변환
+    legacy_paths = []
     for path in file_paths:
-        if not os.path.isfile(path) or path in duplicate_hashes:
+        if not is_legacy_office_file(path):
             continue
-        simplified = simplify_filename(os.path.basename(path))
-        file_groups[simplified].append(path)
-    for group, files in file_groups.items():
-        if len(files) <= 1:
+        try:
+            if cache is None or cache.lookup(path, stat_record(path, snapshot), "text_fingerprint") is None:
+                legacy_paths.append(path)
+        except OSError:
             continue
-        similarity_graph = defaultdict(set)
-        for i in range(len(files)):
-            for j in range(i + 1, len(files)):
-                if is_content_similar(files[i], files[j]):
-                    similarity_graph[files[i]].add(files[j])
-                    similarity_graph[files[j]].add(files[i])
-        all_related = set()
-        for k, v in similarity_graph.items():
-            all_related.add(k)
-            all_related.update(v)
-        unclustered = set(files) - all_related
-        for f in unclustered:
-            similarity_graph[f] = set()
+    if legacy_paths:
+        convert_legacy_files(legacy_paths)
+    name_groups = defaultdict(list)
+    for path, signature in content_signatures(file_paths, cache=cache, snapshot=snapshot).items():
+        group_key = simplify_filename(os.path.basename(path))
+        if signature is None:
+            textless_groups[group_key].append(path)
+        else:
+            index.add(path, signature)
+            name_groups[group_key].append(path)
+    name_pairs = [(a, b) if a <= b else (b, a)
+                  for group in name_groups.values() for i, a in enumerate(group) for b in group[i + 1:]]
+
+    texts = {}
+
+    def text_of(path):
+        if path not in texts:
+            texts[path] = extract_text(path, max_chars=MAX_SHINGLE_CHARS) or ""
+        return texts[path]
+
+    similarity_graph = index.similarity_graph(
+        lambda a, b: is_text_similar(text_of(a), text_of(b), threshold), name_pairs
+    )
+    for group in textless_groups.values():
+        for path in group:
+            similarity_graph[path] = set(group) - {path}
+    return similarity_graph
+
+def isolate_all(directory, cache_path=DEFAULT_HASH_CACHE_PATH, cache_max_entries=DEFAULT_MAX_ENTRIES, snapshot=None):
+    """중복/구버전 파일을 삭제 후보 폴더로 이동. cache_path=None이면 해시 캐시를 쓰지 않음.
+    snapshot(file_scan.ScanSnapshot)을 넘기면 다시 훑지 않고 그 스캔 결과를 쓰며, 옮긴 파일은 스냅샷에서 뺌"""
+    print(f"\n📌 전체 폴더 기반 중복 및 구버전 정리 시작: {directory}\n")
+    cache = HashCache(cache_path, max_entries=cache_max_entries) if cache_path else None
+    if snapshot is None:
+        snapshot = scan_directory(directory)
+    file_paths = snapshot.paths(include_hidden=True)
+    duplicate_hashes = set()
+    try:
+        for hash_group in find_duplicate_groups(file_paths, cache=cache, snapshot=snapshot):
+            duplicate_hashes.update(hash_group)
+            latest = max(hash_group, key=lambda x: snapshot.stat(x).mtime)
+            for f in hash_group:
+                if f != latest:
+                    move_to_category(f, "중복파일", reason="전체 검사 기반 중복파일 정리")
+                    snapshot.discard(f)
+        remaining = [path for path in file_paths if path in snapshot and path not in duplicate_hashes]
+        similarity_graph = build_content_similarity_graph(remaining, cache=cache, snapshot=snapshot)
         clusters = build_similarity_clusters(similarity_graph)
         for cluster in clusters:
-            latest = max(cluster, key=lambda x: os.path.getmtime(x))
+            if len(cluster) <= 1:
+                continue
+            latest = max(cluster, key=lambda x: snapshot.stat(x).mtime)
             for f in cluster:
                 if f != latest:
                     move_to_category(f, "구버전", reason="내용 유사 기반 구버전 정리")
+                    snapshot.discard(f)
+        if cache is not None:
+            # 옮기거나 지워져 이 폴더에 더 없는 파일의 항목은 스캔 결과와 비교해 정리 (추가 stat 없음)
+            cache.prune_missing(root=directory, existing=snapshot.paths(include_hidden=True))
+    finally:
+        if cache is not None:
+            cache.close()
     print("\n✅ 전체 정리가 완료되었습니다.\n")
@@ -0,0 +1,86 @@
+import os
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+FOLDER_MATCH_THRESHOLD = 0.65
+
+def normalize_korean_foldername(text):
+    return re.sub(r'[\s_]', '', text.strip())
+
+class FolderNameIndex:
+    """정규화한 폴더명을 글자별 역색인(글자 → [(이름 id, 등장 횟수)])으로 들고 있는 유사 폴더명 검색기.
+
+    두 이름이 공유하는 글자 수로 SequenceMatcher.ratio의 상한(quick_ratio)을 바로 구할 수 있으므로,
+    질의 이름과 글자를 하나라도 공유하는 이름만 훑고 그중 상한이 threshold 이상인 것만 상한이 높은
+    순서로 실제 ratio를 계산함. 모든 이름과 비교하는 것과 결과가 같음(가장 비슷한 이름 반환).
+    """
+
+    def __init__(self, names=()):
+        self._originals = {}
+        self._keys = []
+        self._postings = defaultdict(list)
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._originals.values())
+
+    def add(self, name):
+        """이름을 색인에 추가 (정규화 결과가 같은 이름이 이미 있으면 처음 이름을 유지)"""
+        key = normalize_korean_foldername(name)
+        if not key or key in self._originals:
+            return
+        self._originals[key] = name
+        name_id = len(self._keys)
+        self._keys.append(key)
+        for char, count in Counter(key).items():
+            self._postings[char].append((name_id, count))
+
+    def best_match(self, name, threshold=FOLDER_MATCH_THRESHOLD):
+        """정규화한 이름끼리의 유사도가 threshold 이상인 기존 이름 중 가장 비슷한 것 (없으면 None)"""
+        key = normalize_korean_foldername(name)
+        if not key:
+            return None
+        if key in self._originals:
+            return self._originals[key]
+        shared = defaultdict(int)
+        for char, count in Counter(key).items():
+            for name_id, other_count in self._postings.get(char, ()):
+                shared[name_id] += min(count, other_count)
+        bounds = []
+        for name_id, common in shared.items():
+            bound = 2.0 * common / (len(key) + len(self._keys[name_id]))
+            if bound >= threshold:
+                bounds.append((-bound, name_id))
+        bounds.sort()
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(key)
+        best_id, best_score = None, threshold
+        for negative_bound, name_id in bounds:
+            if -negative_bound < best_score or (best_id is not None and -negative_bound == best_score):
+                break
+            matcher.set_seq1(self._keys[name_id])
+            score = matcher.ratio()
+            if score > best_score or (best_id is None and score >= best_score):
+                best_id, best_score = name_id, score
+        return self._originals[self._keys[best_id]] if best_id is not None else None
+
+    def add_output_folders(self, output_path):
+        """이미 정리된 출력 폴더(출력/연도/분기/폴더명)의 폴더명을 색인에 넣음"""
+        for year in _subdirs(output_path):
+            for quarter in _subdirs(year):
+                for folder in _subdirs(quarter):
+                    self.add(os.path.basename(folder))
+        return self
+
+def _subdirs(path):
+    try:
+        with os.scandir(path) as entries:
+            return [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
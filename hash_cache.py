@@ -0,0 +1,170 @@
+import os
+import sqlite3
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ✅ 캐시 파일 기본 위치 (검사 대상 폴더 바깥)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".local_file_organizer")
+DEFAULT_HASH_CACHE_PATH = os.path.join(CACHE_DIR, "hash_cache.sqlite3")
+
+HASH_FIELDS = ("sha256", "partial_hash", "text_fingerprint")
+HASH_CHUNK_SIZE = 1024 * 1024
+# 같은 프로세스 안에서 (경로, 크기, 수정시간)이 같은 파일의 해시를 기억해 둘 개수
+DIGEST_MEMO_SIZE = 4096
+# 기본 항목 수 상한 (넘으면 가장 오래 쓰지 않은 항목부터 삭제)
+DEFAULT_MAX_ENTRIES = 500_000
+
+def file_sha256(file_path, chunk_size=HASH_CHUNK_SIZE):
+    """청크 단위 스트리밍 SHA-256 (파일 크기와 무관하게 메모리 사용량 고정)"""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+_digest_memo = OrderedDict()
+_digest_lock = threading.Lock()
+
+def cached_file_sha256(file_path, st=None):
+    """file_sha256과 같지만 실행 중 같은 파일(경로/크기/수정시간 기준)은 한 번만 해시함.
+    텍스트 추출과 구형 오피스 변환처럼 한 파일의 해시를 여러 단계에서 쓸 때 사용"""
+    st = os.stat(file_path) if st is None else st
+    key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        digest = _digest_memo.get(key)
+        if digest is not None:
+            _digest_memo.move_to_end(key)
+            return digest
+    digest = file_sha256(file_path)
+    with _digest_lock:
+        _digest_memo[key] = digest
+        while len(_digest_memo) > DIGEST_MEMO_SIZE:
+            _digest_memo.popitem(last=False)
+    return digest
+
+def _same_stat(row, st):
+    """(크기, 수정시간, inode)가 같은지. Windows 스캔 결과처럼 inode를 모르면(0) inode는 비교하지 않음"""
+    size, mtime_ns, inode = row[:3]
+    if (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+        return False
+    return not inode or not st.st_ino or inode == st.st_ino
+
+class HashCache:
+    """경로 + (크기, 수정시간, inode) 기준으로 해시/지문을 저장하는 SQLite 캐시.
+
+    파일의 stat 정보가 바뀌면 해당 항목은 자동으로 무효화되고,
+    max_entries가 지정되면 가장 오래 사용되지 않은 항목부터 삭제(LRU)함.
+    """
+
+    def __init__(self, db_path=DEFAULT_HASH_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                sha256 TEXT,
+                partial_hash TEXT,
+                text_fingerprint TEXT,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_file_hashes_access ON file_hashes(last_access)")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, path, st, field):
+        """stat이 일치하면 저장된 값을 반환, 바뀌었으면 항목을 지우고 None 반환"""
+        if field not in HASH_FIELDS:
+            raise ValueError(f"Unknown cache field: {field}")
+        path = os.path.abspath(path)
+        row = self.conn.execute(
+            f"SELECT size, mtime_ns, inode, {field} FROM file_hashes WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        if not _same_stat(row, st):
+            self.invalidate(path)
+            return None
+        if row[3] is not None:
+            self.conn.execute("UPDATE file_hashes SET last_access = ? WHERE path = ?", (time.time(), path))
+        return row[3]
+
+    def store(self, path, st, **fields):
+        """해시 값 저장. stat이 바뀐 기존 항목은 다른 필드까지 모두 초기화"""
+        unknown = set(fields) - set(HASH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown cache field(s): {', '.join(sorted(unknown))}")
+        path = os.path.abspath(path)
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, inode FROM file_hashes WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and not _same_stat(row, st):
+            self.invalidate(path)
+            row = None
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO file_hashes (path, size, mtime_ns, inode, last_access) VALUES (?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, now),
+            )
+        if fields:
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            self.conn.execute(
+                f"UPDATE file_hashes SET {assignments}, last_access = ? WHERE path = ?",
+                (*fields.values(), now, path),
+            )
+
+    def invalidate(self, path):
+        self.conn.execute("DELETE FROM file_hashes WHERE path = ?", (os.path.abspath(path),))
+
+    def prune_missing(self, root=None, existing=None):
+        """더 이상 존재하지 않는 파일의 항목 삭제.
+        root를 주면 그 폴더 아래 항목만 보고, existing(방금 스캔한 경로 모음)을 주면 stat 없이 그 안에 없는 것을 지움"""
+        rows = self.conn.execute("SELECT path FROM file_hashes")
+        if root is not None:
+            prefix = os.path.join(os.path.abspath(root), "")
+            rows = ((path,) for (path,) in rows if path.startswith(prefix))
+        if existing is not None:
+            existing = {os.path.abspath(path) for path in existing}
+            missing = [(path,) for (path,) in rows if path not in existing]
+        else:
+            missing = [(path,) for (path,) in rows if not os.path.exists(path)]
+        self.conn.executemany("DELETE FROM file_hashes WHERE path = ?", missing)
+        self.conn.commit()
+        return len(missing)
+
+    def evict(self):
+        """max_entries를 넘는 만큼 가장 오래 사용되지 않은 항목 삭제"""
+        if not self.max_entries:
+            return 0
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM file_hashes WHERE path IN (SELECT path FROM file_hashes ORDER BY last_access LIMIT ?)",
+            (excess,),
+        )
+        return excess
+
+    def commit(self):
+        self.evict()
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.commit()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,251 @@
+import os
+import hmac
+import json
+import queue
+import socket
+import secrets
+import threading
+import socketserver
+from hash_cache import CACHE_DIR
+
+# ✅ Unix 소켓을 지원하지 않는 환경(Windows)에서는 로컬 TCP 포트로 대체
+# TCP는 루프백 주소에만 열고, 같은 컴퓨터의 다른 사용자가 붙지 못하도록 서버를 띄울 때마다
+# 새 토큰을 사용자 전용 파일(TOKEN_PATH)에 써 두고 연결마다 첫 요청으로 확인함
+HAS_UNIX_SOCKET = hasattr(socket, "AF_UNIX")
+DEFAULT_SOCKET_PATH = os.path.join(CACHE_DIR, "inference.sock")
+DEFAULT_TCP_ADDRESS = ("127.0.0.1", 8765)
+TOKEN_PATH = os.path.join(CACHE_DIR, "inference.token")
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+DEFAULT_ADDRESS = DEFAULT_SOCKET_PATH if HAS_UNIX_SOCKET else DEFAULT_TCP_ADDRESS
+
+def _send(stream, message):
+    stream.write((json.dumps(message, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+    stream.flush()
+
+def _receive(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Inference server closed the connection")
+    return json.loads(line)
+
+def _model_info(model):
+    info = {"params": getattr(model, "params", None) or {}, "n_ctx": None}
+    llama = getattr(model, "model", None)
+    if llama is not None and hasattr(llama, "n_ctx"):
+        try:
+            info["n_ctx"] = llama.n_ctx()
+        except Exception:
+            pass
+    return info
+
+class _InferenceWorker:
+    """모든 연결의 요청을 도착 순서대로 하나씩 모델에 넘기는 단일 작업 스레드"""
+
+    def __init__(self, model):
+        self.model = model
+        self.requests = queue.Queue()
+        threading.Thread(target=self._run, name="inference-worker", daemon=True).start()
+
+    def _run(self):
+        while True:
+            request, reply = self.requests.get()
+            try:
+                reply.put({"ok": True, "result": self._handle(request)})
+            except Exception as e:
+                reply.put({"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    def _handle(self, request):
+        op = request.get("op")
+        if op == "completion":
+            return self.model.create_completion(request["prompt"], **request.get("kwargs", {}))
+        if op == "tokenize":
+            return self.model.model.tokenize(request["text"].encode("utf-8"), add_bos=request.get("add_bos", True))
+        if op == "info":
+            return _model_info(self.model)
+        if op == "ping":
+            return "pong"
+        raise ValueError(f"Unknown op: {op}")
+
+    def submit(self, request):
+        reply = queue.Queue(maxsize=1)
+        self.requests.put((request, reply))
+        return reply.get()
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        token = getattr(self.server, "token", None)
+        if token is not None:
+            try:
+                request = _receive(self.rfile)
+            except (ConnectionError, ValueError):
+                return
+            if request.get("op") != "auth" or not hmac.compare_digest(str(request.get("token", "")), token):
+                _send(self.wfile, {"ok": False, "error": "PermissionError: invalid token"})
+                return
+            _send(self.wfile, {"ok": True, "result": None})
+        while True:
+            try:
+                request = _receive(self.rfile)
+            except (ConnectionError, ValueError):
+                return
+            _send(self.wfile, self.server.worker.submit(request))
+
+if HAS_UNIX_SOCKET:
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def _socket_in_use(path):
+    """path의 Unix 소켓에 응답하는 서버가 있으면 True (연결이 거부되면 죽은 서버가 남긴 파일)"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(2)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+def _write_token(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    token = secrets.token_hex(32)
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+def serve(model, address=DEFAULT_ADDRESS):
+    """모델을 메모리에 올려둔 채 요청을 받는 상주 추론 서버 (Ctrl+C로 종료).
+    여러 정리 작업에서 동시에 요청해도 한 번에 하나씩 순서대로 처리함.
+    같은 소켓에서 이미 서버가 돌고 있으면 띄우지 않음. TCP는 루프백 주소만 허용하고 토큰으로 인증함"""
+    socket_inode = None
+    if isinstance(address, str):
+        os.makedirs(os.path.dirname(os.path.abspath(address)), exist_ok=True)
+        if os.path.exists(address):
+            if _socket_in_use(address):
+                print(f"⚠️ 추론 서버가 이미 실행 중입니다: {address}")
+                return
+            os.remove(address)
+        # bind()가 소켓 파일을 만드는 순간부터 소유자만 접근하도록 umask를 잠시 좁힘 (chmod는 틈이 생김)
+        old_umask = os.umask(0o177)
+        try:
+            server = _UnixServer(address, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        socket_inode = os.stat(address).st_ino
+    else:
+        if address[0] not in LOOPBACK_HOSTS:
+            raise ValueError(f"TCP inference server must bind to a loopback address, got {address[0]!r}")
+        server = _TCPServer(address, _RequestHandler)
+        server.token = _write_token(TOKEN_PATH)
+    server.worker = _InferenceWorker(model)
+    print(f"✅ 추론 서버 대기 중: {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("추론 서버를 종료합니다.")
+    finally:
+        server.server_close()
+        # 다른 서버가 그 사이 같은 경로에 만든 소켓은 지우지 않음
+        try:
+            if socket_inode is not None and os.stat(address).st_ino == socket_inode:
+                os.remove(address)
+        except OSError:
+            pass
+
+class _RemoteTokenizer:
+    """count_tokens/get_model_limits가 찾는 model.model 자리를 채우는 원격 토크나이저"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def tokenize(self, text, add_bos=True):
+        return self.client.request({"op": "tokenize", "text": text.decode("utf-8"), "add_bos": add_bos})
+
+    def n_ctx(self):
+        return self.client.info["n_ctx"]
+
+class InferenceClient:
+    """상주 추론 서버에 붙는 클라이언트. NexaTextInference와 같은 create_completion을 제공함"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        self.address = address
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._stream = None
+        self._info = None
+        self.model = _RemoteTokenizer(self)
+
+    def _connect(self):
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+            stream = sock.makefile("rwb")
+            if family == socket.AF_INET:
+                with open(TOKEN_PATH, "r", encoding="utf-8") as f:
+                    _send(stream, {"op": "auth", "token": f.read().strip()})
+                if not _receive(stream)["ok"]:
+                    raise ConnectionError("Inference server rejected the token")
+        except (OSError, ValueError):
+            sock.close()
+            raise
+        self._sock = sock
+        self._stream = stream
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._stream.close()
+                self._sock.close()
+                self._sock = self._stream = None
+
+    def request(self, message):
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                _send(self._stream, message)
+                reply = _receive(self._stream)
+            except (OSError, ConnectionError):
+                self._sock = self._stream = None
+                raise
+        if not reply["ok"]:
+            raise RuntimeError(f"Inference server error: {reply['error']}")
+        return reply["result"]
+
+    @property
+    def info(self):
+        if self._info is None:
+            self._info = self.request({"op": "info"})
+        return self._info
+
+    @property
+    def params(self):
+        return self.info["params"]
+
+    def ping(self):
+        try:
+            return self.request({"op": "ping"}) == "pong"
+        except (OSError, ConnectionError):
+            return False
+
+    def create_completion(self, prompt, **kwargs):
+        return self.request({"op": "completion", "prompt": prompt, "kwargs": kwargs})
+
+def connect_if_running(address=DEFAULT_ADDRESS):
+    """서버가 떠 있으면 클라이언트를, 아니면 None을 반환"""
+    if isinstance(address, str) and not os.path.exists(address):
+        return None
+    probe = InferenceClient(address, timeout=2)
+    running = probe.ping()
+    probe.close()
+    return InferenceClient(address) if running else None
@@ -0,0 +1,158 @@
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+from collections import defaultdict
+from hash_cache import CACHE_DIR, cached_file_sha256
+
+# ✅ 변환 결과 저장 위치 (검사 대상 폴더 바깥, 원본 내용 해시로 구분)
+CONVERSION_CACHE_DIR = os.path.join(CACHE_DIR, "converted")
+LEGACY_TARGETS = {".doc": "docx", ".ppt": "pptx"}
+# soffice 한 번에 넘길 최대 파일 수 (Windows 명령줄 길이 제한 대비)
+CONVERSION_BATCH_SIZE = 200
+CONVERSION_TIMEOUT = 600
+# 변환에 실패한 내용은 이 시간 동안 다시 시도하지 않음 (soffice를 파일마다 다시 띄우지 않도록)
+FAILED_RETRY_SECONDS = 24 * 3600
+# 변환 캐시 크기 상한. 넘으면 가장 오래 쓰지 않은 변환 결과부터 지움
+CONVERSION_CACHE_MAX_BYTES = 2 * 1024 ** 3
+FAILED_SUFFIX = ".failed"
+
+def is_legacy_office_file(path):
+    return os.path.splitext(path)[1].lower() in LEGACY_TARGETS
+
+def _converted_path(content_hash, ext):
+    return os.path.join(CONVERSION_CACHE_DIR, f"{content_hash}.{LEGACY_TARGETS[ext]}")
+
+def _failed_marker(content_hash, ext):
+    return _converted_path(content_hash, ext) + FAILED_SUFFIX
+
+def _recently_failed(content_hash, ext):
+    try:
+        return time.time() - os.path.getmtime(_failed_marker(content_hash, ext)) < FAILED_RETRY_SECONDS
+    except OSError:
+        return False
+
+def _touch(path):
+    """캐시 정리 때 최근에 쓴 결과를 남기도록 수정 시각을 갱신"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def prune_conversion_cache(max_bytes=CONVERSION_CACHE_MAX_BYTES):
+    """변환 캐시가 max_bytes를 넘으면 수정 시각이 오래된 것부터 지우고, 만료된 실패 표시와
+    중단된 실행이 남긴 staging 폴더도 정리함"""
+    now = time.time()
+    entries = []
+    try:
+        with os.scandir(CONVERSION_CACHE_DIR) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name.startswith("staging-") and now - st.st_mtime > FAILED_RETRY_SECONDS:
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                    elif entry.name.endswith(FAILED_SUFFIX):
+                        if now - st.st_mtime >= FAILED_RETRY_SECONDS:
+                            os.remove(entry.path)
+                    else:
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                except OSError:
+                    continue
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            continue
+
+def _stage_file(src, staged):
+    try:
+        os.link(src, staged)
+    except OSError:
+        shutil.copy2(src, staged)
+
+def _run_soffice(target, staged_paths, profile_dir):
+    """하나의 soffice 프로세스로 여러 파일을 한꺼번에 변환"""
+    for start in range(0, len(staged_paths), CONVERSION_BATCH_SIZE):
+        batch = staged_paths[start:start + CONVERSION_BATCH_SIZE]
+        try:
+            subprocess.run([
+                'soffice', '--headless', '--norestore',
+                f'-env:UserInstallation={profile_dir}',
+                '--convert-to', target, '--outdir', CONVERSION_CACHE_DIR, *batch
+            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=CONVERSION_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"❌ LibreOffice 변환 실패 ({len(batch)}개 파일): {e}")
+
+def convert_legacy_files(paths):
+    """.doc/.ppt 파일들을 모아 형식별로 soffice를 한 번씩만 실행해 변환.
+
+    결과는 CONVERSION_CACHE_DIR/<내용 해시>.<확장자>에 저장되므로 같은 내용은
+    다시 변환하지 않음. 실패한 내용은 FAILED_RETRY_SECONDS 동안 다시 시도하지 않음.
+    {원본 경로: 변환된 경로 또는 None} 반환
+    """
+    os.makedirs(CONVERSION_CACHE_DIR, exist_ok=True)
+    results = {}
+    pending = defaultdict(dict)
+    for path in paths:
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in LEGACY_TARGETS:
+            continue
+        try:
+            content_hash = cached_file_sha256(path)
+        except OSError as e:
+            print(f"Error hashing {path}: {e}")
+            results[path] = None
+            continue
+        converted = _converted_path(content_hash, ext)
+        if os.path.exists(converted):
+            _touch(converted)
+            results[path] = converted
+        elif _recently_failed(content_hash, ext):
+            results[path] = None
+        else:
+            results[path] = converted
+            pending[ext].setdefault(content_hash, path)
+    if not pending:
+        return results
+
+    staging_dir = tempfile.mkdtemp(prefix="staging-", dir=CONVERSION_CACHE_DIR)
+    try:
+        # 별도 프로필을 써서 사용자가 띄워둔 LibreOffice와 충돌하지 않게 함
+        profile_dir = "file:///" + os.path.join(staging_dir, "profile").replace("\\", "/").lstrip("/")
+        for ext, sources in pending.items():
+            staged_paths = []
+            for content_hash, src in sources.items():
+                staged = os.path.join(staging_dir, f"{content_hash}{ext}")
+                try:
+                    _stage_file(src, staged)
+                except OSError as e:
+                    print(f"Error staging {src}: {e}")
+                    continue
+                staged_paths.append(staged)
+            if staged_paths:
+                _run_soffice(LEGACY_TARGETS[ext], staged_paths, profile_dir)
+            for content_hash in sources:
+                if not os.path.exists(_converted_path(content_hash, ext)):
+                    # 실패도 내용 해시별로 기억해 두어 다음 추출 때 soffice를 다시 띄우지 않음
+                    try:
+                        with open(_failed_marker(content_hash, ext), "w"):
+                            pass
+                    except OSError:
+                        pass
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    prune_conversion_cache()
+
+    return {path: (converted if converted and os.path.exists(converted) else None)
+            for path, converted in results.items()}
+
+def convert_legacy_file(path):
+    return convert_legacy_files([path]).get(path)
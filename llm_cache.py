@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from hash_cache import CACHE_DIR
+
+DEFAULT_LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+
+def model_identity(model_path):
+    """모델 파일 경로 + 크기 + 수정시간 (파일을 바꾸면 캐시가 자동으로 갈림)"""
+    try:
+        st = os.stat(model_path)
+        return f"{os.path.abspath(model_path)}:{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        return model_path
+
+def make_cache_key(prompt, model_id, params, kwargs=None):
+    """프롬프트 + 모델 파일 + 샘플링 설정을 합친 해시"""
+    payload = json.dumps({
+        "prompt": prompt,
+        "model": model_id,
+        "params": params,
+        "kwargs": kwargs or {},
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CachedInference:
+    """create_completion 응답을 디스크에 저장해 같은 프롬프트/설정이면 추론을 건너뛰는 래퍼.
+
+    temperature=0.0 처럼 결과가 결정적인 설정에서만 의미가 있음. 그 밖의 속성은
+    감싼 모델로 그대로 넘기므로 기존 text_inference 자리에 그대로 쓸 수 있음.
+    """
+
+    def __init__(self, model, model_id, params, cache_path=DEFAULT_LLM_CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self.wrapped = model
+        self.model_id = model_id
+        self.sampling_params = dict(params)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def create_completion(self, prompt, **kwargs):
+        key = make_cache_key(prompt, self.model_id, self.sampling_params, kwargs)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if row is not None:
+            return json.loads(row[0])
+
+        response = self.wrapped.create_completion(prompt, **kwargs)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, response, created) VALUES (?, ?, ?)",
+                (key, json.dumps(response, ensure_ascii=False, default=str), time.time()),
+            )
+            self._conn.commit()
+        return response
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
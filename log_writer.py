@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+# ✅ 로그 레코드 형식 (한 줄에 JSON 객체 하나, JSONL)
+#   공통 필드: v(스키마 버전), ts(ISO 시각), event
+#   event별 필드:
+#     filename_classified        file, path, folder(실패 시 null)
+#     filename_group_classified  file, path, folder(실패 시 null)
+#     content_classified         file, path, folder, filename, description, seconds
+#     embedding_classified       file, path, folder, score, kind("filename"/"content")
+#     move                       source, destination, link_type, status("ok"/"error"), error(실패 시)
+SCHEMA_VERSION = 1
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BUFFER = 1000
+
+_CLOSE = object()
+
+class LogWriter:
+    """O_APPEND로 연 파일 하나에 백그라운드 스레드가 모아 쓰는 JSONL 로그 작성기.
+
+    레코드는 max_buffer개가 쌓이거나 flush_interval초가 지나면 기록하므로 줄마다 파일을 열고 닫지 않음.
+    레코드마다 os.write 한 번으로 줄 끝까지 쓰므로 다른 프로세스가 같은 파일에 써도 줄 단위로 이어 붙음.
+    (로컬 파일시스템 기준. 네트워크 드라이브에서는 O_APPEND가 원자적이지 않을 수 있음)
+    """
+
+    def __init__(self, path, flush_interval=DEFAULT_FLUSH_INTERVAL, max_buffer=DEFAULT_MAX_BUFFER):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, event, **fields):
+        record = {"v": SCHEMA_VERSION, "ts": datetime.now().isoformat(timespec="seconds"), "event": event}
+        record.update(fields)
+        self._queue.put(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _write_record(self, data):
+        # 짧게 써진 경우에만 나머지를 이어 씀 (일반 파일에서는 거의 일어나지 않음)
+        while data:
+            data = data[os.write(self._fd, data):]
+
+    def _write_buffer(self, buffer):
+        for line in buffer:
+            self._write_record((line + "\n").encode("utf-8"))
+        buffer.clear()
+
+    def _run(self):
+        buffer = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                self._write_buffer(buffer)
+                return
+            if isinstance(item, threading.Event):
+                self._write_buffer(buffer)
+                last_flush = time.monotonic()
+                item.set()
+                continue
+            if item is not None:
+                buffer.append(item)
+            if len(buffer) >= self.max_buffer or time.monotonic() - last_flush >= self.flush_interval:
+                self._write_buffer(buffer)
+                last_flush = time.monotonic()
+
+    def flush(self):
+        """지금까지 받은 레코드를 모두 파일에 쓸 때까지 기다림"""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        os.close(self._fd)
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_log_writer(path):
+    """같은 경로에는 프로세스 안에서 작성기 하나만 공유함"""
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None or writer._closed:
+            writer = _writers[path] = LogWriter(path)
+        return writer
+
+def log_event(log_file, event, **fields):
+    get_log_writer(log_file).write(event, **fields)
+
+def close_all_writers():
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
+        _writers.clear()
+
+atexit.register(close_all_writers)
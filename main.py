@@ -1,32 +1,34 @@
 import os
 import time
-import re
-from difflib import get_close_matches
 from datetime import datetime
-from file_utils import collect_file_paths, read_file_data
+from file_utils import read_file_data, iter_read_files_parallel, DEFAULT_READ_TIMEOUT
 from data_processing_common import compute_operations, execute_operations
-from text_data_processing import process_text_files
+from text_data_processing import process_text_stream
+from pipeline import iter_pipeline, DEFAULT_EXTRACT_WORKERS, DEFAULT_MAX_IN_FLIGHT
 from output_filter import filter_specific_output
-from nexa.gguf import NexaTextInference
-from content_classifier import classify_filenames_bulk, extract_examples_from_log, remove_duplicate_examples
+from content_classifier import classify_filenames_bulk
+from example_store import ExampleStore
 from fileremover import isolate_all as process_delete_candidates
+from llm_cache import CachedInference, model_identity
+from run_manifest import RunManifest
+from file_scan import scan_directory, stat_record
+from operation_journal import OperationJournal
+from folder_index import FolderNameIndex, FOLDER_MATCH_THRESHOLD
+from embedding_classifier import (
+    EmbeddingClassifier, DEFAULT_EMBEDDING_MODEL, embeddings_available, filename_text, content_text,
+    FILENAME_KIND, CONTENT_KIND, CONTENT_ROUTE_BATCH,
+)
+from log_writer import log_event
+from watcher import watch_directory
+from inference_server import serve, connect_if_running
+from legacy_converter import convert_legacy_files, is_legacy_office_file
 
-def normalize_korean_foldername(text):
-    return re.sub(r'[\s_]', '', text.strip())
-
-def normalize_foldername(foldername, existing_names, threshold=0.65):
-    simplified_input = normalize_korean_foldername(foldername)
-    simplified_existing = {name: normalize_korean_foldername(name) for name in existing_names}
-    for orig_name, simplified in simplified_existing.items():
-        if get_close_matches(simplified_input, [simplified], n=1, cutoff=threshold):
-            return orig_name
-    return foldername
-
-def ensure_nltk_data():
-    import nltk
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
-    nltk.download('wordnet', quiet=True)
+def normalize_foldername(foldername, existing_names, threshold=FOLDER_MATCH_THRESHOLD):
+    """기존 폴더명 중 충분히 비슷한 것이 있으면 그 이름을, 없으면 그대로 반환.
+    existing_names는 FolderNameIndex (이름 목록을 넘기면 그 자리에서 색인을 만듦)"""
+    if not isinstance(existing_names, FolderNameIndex):
+        existing_names = FolderNameIndex(existing_names)
+    return existing_names.best_match(foldername, threshold) or foldername
 
 def simulate_directory_tree(operations, base_path):
     tree = {}
@@ -48,42 +50,87 @@ def print_simulated_tree(tree, prefix=''):
             extension = '│   ' if pointer == '├── ' else '    '
             print_simulated_tree(tree[key], prefix + extension)
 
-def get_quarter_path(file_path):
-    created_time = os.path.getctime(file_path)
+def get_quarter_path(file_path, snapshot=None):
+    created_time = stat_record(file_path, snapshot).ctime
     dt = datetime.fromtimestamp(created_time)
     year = str(dt.year)
     quarter = (dt.month - 1) // 3 + 1
     return os.path.join(year, f"{quarter}분기")
 
+# 실행 로그는 JSONL 레코드로 기록 (예전 텍스트 로그는 few-shot 예시를 처음 가져올 때만 읽음)
+LOG_FILE = 'operation_log.jsonl'
+LEGACY_LOG_FILE = 'operation_log.txt'
+
+MODEL_PATH = r"C:\\models\\ggml-model-Q4_K_M.gguf"
+MODEL_PARAMS = {
+    "stop_words": [],
+    "temperature": 0.0,
+    "max_new_tokens": 256,
+    "top_k": 3,
+    "top_p": 0.3,
+}
+
 text_inference = None
 
-def initialize_models():
+def load_text_model():
+    """GGUF 모델 로드"""
+    # nexa(llama.cpp)는 불러오는 데만 오래 걸리므로 모델이 실제로 필요할 때 import
+    from nexa.gguf import NexaTextInference
+    with filter_specific_output():
+        model = NexaTextInference(
+            model_path=None,
+            local_path=MODEL_PATH,
+            profiling=False,
+            **MODEL_PARAMS
+        )
+    return model
+
+def initialize_models(use_cache=True, use_server=True):
+    """상주 추론 서버(python main.py serve)가 떠 있으면 거기에 연결하고, 없으면 모델을 직접 로드"""
     global text_inference
     if text_inference is None:
-        with filter_specific_output():
-            text_inference = NexaTextInference(
-                model_path=None,
-                local_path=r"C:\\models\\ggml-model-Q4_K_M.gguf",
-                stop_words=[],
-                temperature=0.0,
-                max_new_tokens=256,
-                top_k=3,
-                top_p=0.3,
-                profiling=False
-            )
-        print("\u2705 텍스트 모델 로컬 로드 완료!")
+        client = connect_if_running() if use_server else None
+        if client is not None:
+            text_inference = client
+            print("\u2705 상주 추론 서버에 연결했습니다!")
+        else:
+            text_inference = load_text_model()
+            print("\u2705 텍스트 모델 로컬 로드 완료!")
+        if use_cache:
+            text_inference = CachedInference(text_inference, model_identity(MODEL_PATH), MODEL_PARAMS)
         print("**----------------------------------------------**")
         print("**       Text inference model initialized       **")
         print("**----------------------------------------------**")
 
-def main(auto_mode=False):
-    ensure_nltk_data()
-    print("-" * 50)
-    print("**NOTE: Silent mode logs all outputs to a text file instead of displaying them in the terminal.")
-    silent_mode = True
-    log_file = 'operation_log.txt'
-    print("-" * 50)
+embedding_classifier = None
 
+def initialize_embeddings(output_path=None):
+    """임베딩 분류기를 한 번만 로드 (sentence-transformers가 없거나 모델이 로컬에 없거나 로드에 실패하면 None).
+    모델은 내려받지 않음. 폴더 중심이 아직 없으면 이미 정리된 출력 폴더의 파일명으로 만듦"""
+    global embedding_classifier
+    if embedding_classifier is None:
+        embedding_classifier = False
+        if not embeddings_available():
+            print("⚠️ sentence-transformers가 설치되어 있지 않아 임베딩 분류 없이 LLM만 사용합니다.")
+        else:
+            try:
+                embedding_classifier = EmbeddingClassifier()
+                print("\u2705 임베딩 분류기 로드 완료!")
+            except OSError as e:
+                print(f"⚠️ 임베딩 모델({DEFAULT_EMBEDDING_MODEL})이 로컬에 없어 LLM만 사용합니다 "
+                      f"(자동으로 내려받지 않음, README 참고): {e}")
+            except Exception as e:
+                print(f"⚠️ 임베딩 분류기를 불러오지 못해 LLM만 사용합니다: {e}")
+    if embedding_classifier and output_path:
+        embedding_classifier.seed_from_output(output_path)
+    return embedding_classifier or None
+
+def print_llm_cache_stats():
+    if isinstance(text_inference, CachedInference):
+        stats = text_inference.stats()
+        print(f"LLM 응답 캐시: 적중 {stats['hits']}회 / 미스 {stats['misses']}회 (적중률 {stats['hit_rate']:.0%})")
+
+def resolve_paths(auto_mode):
     if auto_mode:
         input_path = r"C:\\Users\\qazws\\OneDrive\\바탕 화면\\연습용"
         output_path = os.path.join(os.path.dirname(input_path), 'organized_folder')
@@ -99,80 +146,300 @@ def main(auto_mode=False):
         if not output_path:
             output_path = os.path.join(os.path.dirname(input_path), 'organized_folder')
 
-    print("-" * 50)
+    return input_path, output_path
 
-    # ✅ 분류 먼저!
-    file_paths = collect_file_paths(input_path)
-    initialize_models()
+def classify_files(file_paths, log_file, silent_mode=True, extract_workers=DEFAULT_EXTRACT_WORKERS,
+                   max_in_flight=DEFAULT_MAX_IN_FLIGHT, extract_processes=True, read_timeout=DEFAULT_READ_TIMEOUT,
+                   output_path=None, use_embeddings=False):
+    """파일명 기반 분류 후, 실패한 파일만 내용 기반으로 분류.
+    use_embeddings면 각 단계에서 임베딩 분류기가 확신하는 파일은 LLM 없이 바로 배정하고 나머지만 LLM으로 보냄.
+    [{"file_path", "foldername"}] 반환 (둘 다 실패하면 foldername은 None)"""
+    embedder = initialize_embeddings(output_path) if use_embeddings else None
+    embedded = {}
 
-    examples = extract_examples_from_log(log_file)
-    examples = remove_duplicate_examples(examples, max_examples=50)
+    def assign_by_embedding(paths, texts, kind):
+        for path, (folder, score) in zip(paths, embedder.classify(texts, kind)):
+            if folder:
+                embedded[path] = folder
+                if silent_mode and log_file:
+                    log_event(log_file, "embedding_classified", file=os.path.basename(path), path=path,
+                              folder=folder, score=round(score, 3), kind=kind)
 
-    filename_classified = classify_filenames_bulk(file_paths, text_inference, silent=silent_mode, log_file=log_file, extra_examples=examples)
+    to_classify = list(file_paths)
+    if embedder is not None:
+        assign_by_embedding(to_classify, [filename_text(path) for path in to_classify], FILENAME_KIND)
+        to_classify = [path for path in to_classify if path not in embedded]
+        print(f"[Embedding] 파일명으로 {len(embedded)}/{len(file_paths)}개 바로 배정 (LLM 생략)")
 
-    text_files_for_content = []
-    for item in filename_classified:
-        if item["foldername"] is None:
-            text_content = read_file_data(item["file_path"])
-            if text_content:
-                text_files_for_content.append((item["file_path"], text_content))
+    filename_classified = []
+    if to_classify:
+        initialize_models()
+        # 예시는 로그를 다시 훑지 않고 예시 저장소에서 읽음 (처음 한 번만 기존 로그에서 가져옴)
+        history_log = LEGACY_LOG_FILE if os.path.exists(LEGACY_LOG_FILE) else log_file
+        with ExampleStore(log_file=history_log) as example_store:
+            filename_classified = classify_filenames_bulk(
+                to_classify, text_inference, silent=silent_mode, log_file=log_file, example_store=example_store
+            )
 
-    content_classified = process_text_files(text_files_for_content, text_inference, silent=silent_mode, log_file=log_file)
+    unclassified = [item["file_path"] for item in filename_classified if item["foldername"] is None]
+    convert_legacy_files([p for p in unclassified if is_legacy_office_file(p)])
 
-    final_classification = []
-    existing_names = set()
-    for item in filename_classified:
-        base_foldername = item["foldername"]
+    # 추출 작업자들이 텍스트를 채우는 동안 추론은 끝난 것부터 바로 처리 (동시에 들고 있는 문서 수 제한)
+    if extract_processes:
+        # 파서가 GIL을 잡고 있으므로 프로세스 풀로 분산, 멈춘 파일은 read_timeout초 후 건너뜀
+        extracted = iter_read_files_parallel(unclassified, workers=extract_workers, timeout=read_timeout)
+    else:
+        extracted = iter_pipeline(unclassified, read_file_data, workers=extract_workers, max_in_flight=max_in_flight)
+    content_texts = {}
+
+    def route_batch(batch):
+        for path, text in batch:
+            content_texts[path] = content_text(path, text)
+        assign_by_embedding([path for path, _ in batch], [content_texts[path] for path, _ in batch], CONTENT_KIND)
+        return [(path, text) for path, text in batch if path not in embedded]
+
+    def route_by_content(pairs):
+        # 내용 임베딩으로 확신하는 파일은 여기서 배정하고 나머지만 LLM 요약/분류로 넘김
+        # (임베딩은 추출된 문서를 CONTENT_ROUTE_BATCH개씩 모아 한 번에 계산)
+        batch = []
+        for path, text in pairs:
+            if not text:
+                continue
+            if embedder is None:
+                yield path, text
+                continue
+            batch.append((path, text))
+            if len(batch) >= CONTENT_ROUTE_BATCH:
+                yield from route_batch(batch)
+                batch = []
+        if batch:
+            yield from route_batch(batch)
+
+    content_classified = {}
+    if unclassified:
+        initialize_models()
+    for result in process_text_stream(
+        route_by_content(extracted), text_inference, silent=silent_mode, log_file=log_file
+    ):
+        content_classified[result["file_path"]] = result
+
+    folder_by_path = {item["file_path"]: item["foldername"] for item in filename_classified}
+    classified = []
+    for path in file_paths:
+        base_foldername = embedded.get(path) or folder_by_path.get(path)
         if not base_foldername:
-            matched = next((c for c in content_classified if c["file_path"] == item["file_path"]), None)
+            matched = content_classified.get(path)
             if matched:
                 base_foldername = matched["foldername"]
+        classified.append({
+            "file_path": path,
+            "foldername": base_foldername
+        })
 
+    if embedder is not None:
+        # LLM이 배정한 결과로만 폴더 중심을 갱신 (임베딩이 스스로 배정한 파일은 제외해 자기 강화를 막음)
+        labelled = [item for item in classified if item["foldername"] and item["file_path"] not in embedded]
+        embedder.learn([item["foldername"] for item in labelled],
+                       [filename_text(item["file_path"]) for item in labelled], FILENAME_KIND)
+        with_content = [item for item in labelled if item["file_path"] in content_texts]
+        embedder.learn([item["foldername"] for item in with_content],
+                       [content_texts[item["file_path"]] for item in with_content], CONTENT_KIND)
+    return classified
+
+def build_operations(classified, output_path, manifest=None, content_hashes=None, existing_names=None, snapshot=None):
+    """분류 결과의 폴더명을 정규화하고 분기 폴더 아래로 옮기는 작업 목록을 만듦.
+    manifest가 있으면 옮기기 전에 각 파일의 결정을 기록함 (분류에 실패한 파일은 기록하지 않아 다음 증분 실행에서 다시 분류됨)"""
+    content_hashes = content_hashes or {}
+    if existing_names is None:
+        # 이전 실행에서 만든 출력 폴더명도 후보로 씀
+        existing_names = FolderNameIndex().add_output_folders(output_path)
+    final_classification = []
+    for item in classified:
+        base_foldername = item["foldername"]
         if base_foldername:
+            if manifest is not None:
+                manifest.record(item["file_path"], base_foldername, content_hashes.get(item["file_path"]), snapshot=snapshot)
             base_foldername = normalize_foldername(base_foldername, existing_names)
             existing_names.add(base_foldername)
-            quarter_path = get_quarter_path(item["file_path"])
+            quarter_path = get_quarter_path(item["file_path"], snapshot)
             full_folder_path = os.path.join(quarter_path, base_foldername)
             final_classification.append({
                 "file_path": item["file_path"],
                 "foldername": full_folder_path
             })
+    if manifest is not None:
+        manifest.commit()
 
-    operations = compute_operations(
+    return compute_operations(
         final_classification,
         output_path,
         renamed_files=set(),
         processed_files=set(),
-        preserve_filename=True
+        preserve_filename=True,
+        link_type='move'
     )
 
-    # ✅ 분류 완료 후, 삭제 후보 정리!
-    print("Processing delete candidates (duplicate and old versions)...")
-    process_delete_candidates(input_path)
-    print("Delete candidate processing completed.")
+def main(auto_mode=False, extract_workers=DEFAULT_EXTRACT_WORKERS, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+         extract_processes=True, read_timeout=DEFAULT_READ_TIMEOUT, incremental=False, use_embeddings=False):
+    print("-" * 50)
+    print("**NOTE: Silent mode logs all outputs to a text file instead of displaying them in the terminal.")
+    silent_mode = True
+    log_file = LOG_FILE
     print("-" * 50)
 
-    print("Proposed directory structure:")
-    print(os.path.abspath(output_path))
-    simulated_tree = simulate_directory_tree(operations, output_path)
-    print_simulated_tree(simulated_tree)
+    input_path, output_path = resolve_paths(auto_mode)
     print("-" * 50)
 
-    os.makedirs(output_path, exist_ok=True)
-    execute_operations(
-        operations,
-        dry_run=False,
-        silent=silent_mode,
-        log_file=log_file
+    # ✅ 같은 입력 폴더의 끝나지 않은 이전 실행은 남은 이동을 먼저 마침 (다른 폴더의 실행은 알리기만 함)
+    with OperationJournal() as journal:
+        for run in journal.unfinished_runs():
+            if run[1] == os.path.abspath(input_path):
+                resume_run(journal, run, silent_mode, log_file)
+            else:
+                print(f"⚠️ 완료되지 않은 다른 실행이 있습니다 ({run[1]} → {run[2]}). 'resume'으로 이어서 처리할 수 있습니다.")
+
+    # ✅ 입력 폴더는 한 번만 훑고, 이후 모든 단계가 이 스캔 결과(stat 포함)를 함께 씀
+    snapshot = scan_directory(input_path)
+
+    # ✅ 분류 먼저!
+    file_paths = snapshot.paths()
+    manifest = None
+    reused = {}
+    content_hashes = {}
+    if incremental:
+        # 매니페스트와 비교해 새로 생기거나 바뀐 파일만 분류, 관련 파일의 이전 결정은 재사용
+        manifest = RunManifest()
+        file_paths = manifest.changed_files(file_paths, snapshot=snapshot)
+        reused, content_hashes = manifest.reuse_decisions(file_paths)
+        print(f"[Incremental] 새로 추가되거나 바뀐 파일 {len(file_paths)}개 (이전 폴더 재사용 {len(reused)}개)")
+
+    to_classify = [path for path in file_paths if path not in reused]
+    classified = classify_files(
+        to_classify, log_file, silent_mode=silent_mode, extract_workers=extract_workers,
+        max_in_flight=max_in_flight, extract_processes=extract_processes, read_timeout=read_timeout,
+        output_path=output_path, use_embeddings=use_embeddings
+    ) if to_classify else []
+    classified.extend({"file_path": path, "foldername": foldername} for path, foldername in reused.items())
+
+    operations = build_operations(
+        classified, output_path, manifest=manifest, content_hashes=content_hashes, snapshot=snapshot
     )
+    if manifest is not None:
+        manifest.close()
+
+    # ✅ 실행 전에 계획을 저널에 저장 (중간에 죽으면 `resume`으로 남은 이동만 처리)
+    with OperationJournal() as journal:
+        run_id = journal.start_run(input_path, output_path, classified, operations)
+
+        # ✅ 분류 완료 후, 삭제 후보 정리!
+        print("Processing delete candidates (duplicate and old versions)...")
+        process_delete_candidates(input_path, snapshot=snapshot)
+        print("Delete candidate processing completed.")
+        print("-" * 50)
+        journal.set_stage(run_id, "executing")
+
+        print("Proposed directory structure:")
+        print(os.path.abspath(output_path))
+        simulated_tree = simulate_directory_tree(operations, output_path)
+        print_simulated_tree(simulated_tree)
+        print("-" * 50)
+
+        execute_journaled_operations(journal, run_id, operations, output_path, silent_mode, log_file)
 
     print("-" * 50)
+    print_llm_cache_stats()
     print("The files have been organized successfully.")
     print("-" * 50)
 
+def execute_journaled_operations(journal, run_id, operations, output_path, silent_mode, log_file):
+    """작업을 실행하면서 끝난 작업마다 저널에 완료로 표시 (Ctrl+C로 끊겨도 표시한 데까지는 커밋)"""
+    os.makedirs(output_path, exist_ok=True)
+    try:
+        execute_operations(
+            operations,
+            dry_run=False,
+            silent=silent_mode,
+            log_file=log_file,
+            on_done=lambda op: journal.mark_done(run_id, op)
+        )
+    finally:
+        if not journal.finish_run(run_id):
+            print("⚠️ 일부 작업이 끝나지 않았습니다. 'resume'으로 다시 시도할 수 있습니다.")
+
+def resume_run(journal, run, silent_mode, log_file):
+    """저널에 남은 실행 하나의 남은 이동만 실행 (분류/추론은 다시 하지 않음)"""
+    run_id, input_path, output_path, stage = run
+    if stage == "planned":
+        # 삭제 후보 정리 전에 끊긴 경우
+        print("Processing delete candidates (duplicate and old versions)...")
+        process_delete_candidates(input_path)
+        journal.set_stage(run_id, "executing")
+    operations = journal.pending_operations(run_id)
+    print(f"[Resume] {input_path} → {output_path}: 남은 작업 {len(operations)}개")
+    execute_journaled_operations(journal, run_id, operations, output_path, silent_mode, log_file)
+
+def resume():
+    """중단된 정리 실행을 오래된 것부터 모두 이어서 처리"""
+    silent_mode = True
+    log_file = LOG_FILE
+    with OperationJournal() as journal:
+        runs = journal.unfinished_runs()
+        if not runs:
+            print("이어서 처리할 실행이 없습니다.")
+            return
+        for run in runs:
+            resume_run(journal, run, silent_mode, log_file)
+    print("The files have been organized successfully.")
+
+def watch(auto_mode=False, force_polling=False, use_embeddings=False):
+    """입력 폴더를 계속 감시하면서 새로 들어온 파일을 작은 배치로 바로 정리 (Ctrl+C로 종료).
+    모델은 한 번만 올려두고 배치마다 재사용함"""
+    silent_mode = True
+    log_file = LOG_FILE
+    input_path, output_path = resolve_paths(auto_mode)
+    initialize_models()
+    manifest = RunManifest()
+    existing_names = FolderNameIndex().add_output_folders(output_path)
+
+    output_root = os.path.abspath(output_path) + os.sep
+
+    def on_batch(paths):
+        # 출력 폴더가 입력 폴더 안에 있으면 방금 옮긴 파일이 다시 잡히므로 제외
+        paths = [path for path in paths if not os.path.abspath(path).startswith(output_root)]
+        paths = manifest.changed_files(paths)
+        if not paths:
+            return
+        reused, content_hashes = manifest.reuse_decisions(paths)
+        to_classify = [path for path in paths if path not in reused]
+        # 배치가 작으므로 프로세스 풀 대신 스레드로 추출 (매번 프로세스를 띄우는 비용 회피)
+        classified = classify_files(
+            to_classify, log_file, silent_mode=silent_mode, extract_processes=False, output_path=output_path,
+            use_embeddings=use_embeddings
+        ) if to_classify else []
+        classified.extend({"file_path": path, "foldername": foldername} for path, foldername in reused.items())
+        operations = build_operations(
+            classified, output_path, manifest=manifest, content_hashes=content_hashes, existing_names=existing_names
+        )
+        os.makedirs(output_path, exist_ok=True)
+        execute_operations(operations, dry_run=False, silent=silent_mode, log_file=log_file)
+        print(f"[Watch] {len(operations)}/{len(paths)}개 파일 정리 완료")
+
+    try:
+        watch_directory(input_path, on_batch, force_polling=force_polling)
+    except KeyboardInterrupt:
+        print("감시를 종료합니다.")
+    finally:
+        manifest.close()
+        print_llm_cache_stats()
+
 if __name__ == '__main__':
     import sys
-    auto_mode = False
-    if len(sys.argv) > 1 and sys.argv[1] == "auto":
-        auto_mode = True
-    main(auto_mode)
+    args = sys.argv[1:]
+    if "serve" in args:
+        serve(load_text_model())
+    elif "resume" in args:
+        resume()
+    elif "watch" in args:
+        watch(auto_mode="auto" in args, force_polling="poll" in args, use_embeddings="embed" in args)
+    else:
+        main(auto_mode="auto" in args, incremental="incremental" in args, use_embeddings="embed" in args)
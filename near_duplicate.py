@@ -0,0 +1,95 @@
+import re
+import hashlib
+from collections import defaultdict
+
+# ✅ MinHash 서명 길이 / LSH 밴드 구성 (NUM_PERM = BANDS * ROWS)
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = 4
+SHINGLE_SIZE = 5
+MAX_SHINGLE_CHARS = 200_000
+
+_HASH_MAX = (1 << 64) - 1
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+def shingle_hashes(text, k=SHINGLE_SIZE, max_chars=MAX_SHINGLE_CHARS):
+    """공백을 정리한 뒤 글자 단위 k-shingle의 64비트 해시 집합을 반환"""
+    text = re.sub(r"\s+", " ", text[:max_chars]).strip().lower()
+    if not text:
+        return set()
+    if len(text) <= k:
+        return {_hash64(text)}
+    return {_hash64(text[i:i + k]) for i in range(len(text) - k + 1)}
+
+def minhash_signature(text, num_perm=NUM_PERM):
+    """One-permutation MinHash: 해시 공간을 num_perm개 구간으로 나눠 구간별 최솟값을 취함.
+
+    빈 구간은 다음 구간의 값을 빌려 채워(densification) 일반 MinHash처럼
+    구간별 일치 비율이 자카드 유사도의 추정치가 되도록 함. 텍스트가 없으면 None.
+    """
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return None
+    bins = [None] * num_perm
+    for h in hashes:
+        idx = h % num_perm
+        value = h // num_perm
+        if bins[idx] is None or value < bins[idx]:
+            bins[idx] = value
+    signature = list(bins)
+    for i in range(num_perm):
+        if signature[i] is not None:
+            continue
+        offset = 1
+        while bins[(i + offset) % num_perm] is None:
+            offset += 1
+        # 빌려온 값에 거리 정보를 섞어 서로 다른 빈 구간이 우연히 같아지지 않게 함
+        signature[i] = (bins[(i + offset) % num_perm] + offset * 0x9E3779B97F4A7C15) & _HASH_MAX
+    return signature
+
+def serialize_signature(signature):
+    return "".join(f"{value:016x}" for value in signature)
+
+def deserialize_signature(data):
+    return [int(data[i:i + 16], 16) for i in range(0, len(data), 16)]
+
+class LSHIndex:
+    """MinHash 서명을 밴드 단위로 버킷에 넣어 유사 후보쌍을 근선형 시간에 찾는 인덱스"""
+
+    def __init__(self, bands=LSH_BANDS, rows=LSH_ROWS):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = {}
+
+    def add(self, key, signature):
+        if len(signature) != self.bands * self.rows:
+            raise ValueError(f"Signature length {len(signature)} does not match {self.bands}x{self.rows} bands")
+        self.signatures[key] = signature
+        for band in range(self.bands):
+            start = band * self.rows
+            self.buckets[band][tuple(signature[start:start + self.rows])].append(key)
+
+    def candidate_pairs(self):
+        pairs = set()
+        for band_buckets in self.buckets:
+            for keys in band_buckets.values():
+                if len(keys) < 2:
+                    continue
+                for i in range(len(keys)):
+                    for j in range(i + 1, len(keys)):
+                        a, b = keys[i], keys[j]
+                        pairs.add((a, b) if a <= b else (b, a))
+        return pairs
+
+    def similarity_graph(self, is_similar, extra_pairs=()):
+        """후보쌍(버킷을 공유한 쌍 + extra_pairs) 중 is_similar(a, b)로 실제 확인한 것만 연결한 그래프 (모든 키 포함).
+        MinHash 추정치는 짧은 텍스트에서 오차가 커서 연결 여부를 정하는 데 쓰지 않고 후보를 고르는 데만 씀"""
+        graph = {key: set() for key in self.signatures}
+        for a, b in self.candidate_pairs() | set(extra_pairs):
+            if is_similar(a, b):
+                graph[a].add(b)
+                graph[b].add(a)
+        return graph
@@ -0,0 +1,148 @@
+import os
+import sqlite3
+from datetime import datetime
+from hash_cache import CACHE_DIR
+
+DEFAULT_JOURNAL_PATH = os.path.join(CACHE_DIR, "journal.sqlite3")
+# 완료 표시는 이 개수마다 한 번씩 커밋 (그 사이에 죽어도 resume이 파일 위치로 완료 여부를 판단함)
+COMMIT_EVERY = 100
+# operations.done 값: 0 남음, 1 완료, 2 원본이 없어 건너뜀
+SKIPPED = 2
+
+class OperationJournal:
+    """정리 계획(분류 결과 + 이동 작업)을 실행 전에 저장하고, 작업이 끝날 때마다 완료로 표시하는 저널.
+
+    실행 중에 프로세스가 죽어도 다음에 resume으로 분류(LLM 추론)를 다시 하지 않고 남은 작업만
+    이어서 처리할 수 있음. 실행 단계(stage)는 planned → executing → completed 순으로 바뀜.
+    같은 입력 폴더로 새 실행을 저장하면 그 폴더의 끝나지 않은 이전 실행은 superseded가 됨
+    (새 실행이 폴더를 다시 훑어 남은 파일을 계획에 포함하므로).
+    """
+
+    def __init__(self, db_path=DEFAULT_JOURNAL_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created TEXT NOT NULL,
+                input_path TEXT NOT NULL,
+                output_path TEXT NOT NULL,
+                stage TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS classifications (
+                run_id INTEGER NOT NULL,
+                file_path TEXT NOT NULL,
+                foldername TEXT
+            );
+            CREATE TABLE IF NOT EXISTS operations (
+                run_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                link_type TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, seq)
+            );
+        """)
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, input_path, output_path, classified, operations):
+        """계획 전체를 한 트랜잭션으로 저장하고 run id를 반환"""
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (created, input_path, output_path, stage) VALUES (?, ?, ?, 'planned')",
+                (datetime.now().isoformat(timespec="seconds"), os.path.abspath(input_path), os.path.abspath(output_path)),
+            )
+            run_id = cur.lastrowid
+            self.conn.execute(
+                "UPDATE runs SET stage = 'superseded' WHERE id < ? AND input_path = ? "
+                "AND stage NOT IN ('completed', 'superseded')",
+                (run_id, os.path.abspath(input_path)),
+            )
+            self.conn.executemany(
+                "INSERT INTO classifications (run_id, file_path, foldername) VALUES (?, ?, ?)",
+                [(run_id, item["file_path"], item["foldername"]) for item in classified],
+            )
+            self.conn.executemany(
+                "INSERT INTO operations (run_id, seq, source, destination, link_type) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, seq, os.path.abspath(op["source"]), os.path.abspath(op["destination"]), op.get("link_type", "move"))
+                 for seq, op in enumerate(operations)],
+            )
+        for seq, op in enumerate(operations):
+            op["journal_seq"] = seq
+        return run_id
+
+    def set_stage(self, run_id, stage):
+        with self.conn:
+            self.conn.execute("UPDATE runs SET stage = ? WHERE id = ?", (stage, run_id))
+
+    def unfinished_runs(self):
+        """완료되지 않은 실행 목록 [(id, input_path, output_path, stage)], 오래된 것부터"""
+        return self.conn.execute(
+            "SELECT id, input_path, output_path, stage FROM runs "
+            "WHERE stage NOT IN ('completed', 'superseded') ORDER BY id"
+        ).fetchall()
+
+    def pending_operations(self, run_id):
+        """아직 완료 표시가 없는 작업 목록. 옮기기는 끝났는데 표시 전에 죽은 작업은 여기서 완료 처리함"""
+        pending = []
+        for seq, source, destination, link_type in self.conn.execute(
+            "SELECT seq, source, destination, link_type FROM operations WHERE run_id = ? AND done = 0 ORDER BY seq",
+            (run_id,),
+        ).fetchall():
+            if not os.path.exists(destination):
+                if not os.path.exists(source):
+                    # 원본이 사라진 작업(예: 중복파일 정리로 옮겨짐)은 더 할 수 없으므로 건너뜀으로 표시
+                    self.conn.execute("UPDATE operations SET done = ? WHERE run_id = ? AND seq = ?",
+                                      (SKIPPED, run_id, seq))
+                    continue
+                finished = False
+            elif link_type == "move" or not os.path.exists(source):
+                finished = not os.path.exists(source)
+            else:
+                # 복사 도중에 죽었을 수 있으므로 크기까지 같아야 완료로 봄
+                finished = os.path.getsize(source) == os.path.getsize(destination)
+            if finished:
+                self.conn.execute("UPDATE operations SET done = 1 WHERE run_id = ? AND seq = ?", (run_id, seq))
+                continue
+            pending.append({
+                "source": source,
+                "destination": destination,
+                "link_type": link_type,
+                "journal_seq": seq,
+            })
+        self.conn.commit()
+        return pending
+
+    def mark_done(self, run_id, op):
+        self.conn.execute(
+            "UPDATE operations SET done = 1 WHERE run_id = ? AND seq = ?", (run_id, op["journal_seq"])
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def finish_run(self, run_id):
+        """남은 작업(표시만 빠진 것과 원본이 사라진 것은 제외)이 없으면 completed로 바꾸고 True 반환"""
+        self.commit()
+        finished = not self.pending_operations(run_id)
+        if finished:
+            self.set_stage(run_id, "completed")
+        return finished
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
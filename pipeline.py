@@ -0,0 +1,51 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_EXTRACT_WORKERS = 4
+DEFAULT_MAX_IN_FLIGHT = 8
+
+_DONE = object()
+
+def iter_pipeline(items, produce, workers=DEFAULT_EXTRACT_WORKERS, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """produce(item)을 작업자 스레드들에서 돌리고 끝나는 순서대로 (item, 결과)를 내보냄.
+
+    처리 중이거나 소비되길 기다리는 항목은 최대 max_in_flight개로 제한됨. 소비자가 다음
+    항목을 요청해야 자리가 하나 풀리므로, 소비(추론)가 느리면 추출도 그만큼 멈춤(backpressure).
+    produce에서 예외가 나면 결과는 None.
+    """
+    results = queue.Queue()
+    slots = threading.Semaphore(max_in_flight)
+    stop = threading.Event()
+
+    def run(item):
+        try:
+            value = produce(item)
+        except Exception as e:
+            print(f"❌ 처리 실패 ({item}): {e}")
+            value = None
+        results.put((item, value))
+
+    def feed():
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for item in items:
+                    slots.acquire()
+                    if stop.is_set():
+                        break
+                    executor.submit(run, item)
+        finally:
+            results.put(_DONE)
+
+    feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            message = results.get()
+            if message is _DONE:
+                break
+            yield message
+            slots.release()
+    finally:
+        stop.set()
+        slots.release()
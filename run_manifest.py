@@ -0,0 +1,137 @@
+import os
+import time
+import sqlite3
+from hash_cache import CACHE_DIR, file_sha256
+from file_scan import stat_record
+from content_classifier import preprocess_filename
+
+DEFAULT_MANIFEST_PATH = os.path.join(CACHE_DIR, "run_manifest.sqlite3")
+# 이보다 많은 파일에 등장하는 토큰(연도, "최종" 등)은 관련 파일 검색에 쓰지 않음
+MAX_TOKEN_POSTINGS = 1000
+
+def _name_tokens(filename):
+    return set(preprocess_filename(filename).split())
+
+class RunManifest:
+    """처리한 파일의 (경로, 크기, 수정시간, 내용 해시, 배정 폴더)를 기록하는 SQLite 매니페스트.
+
+    증분 실행 시 새로 생기거나 바뀐 파일만 골라내고, 같은 내용이거나 이름이 비슷한
+    파일이 예전에 받은 폴더를 다시 쓸 수 있게 해 줌.
+    """
+
+    def __init__(self, db_path=DEFAULT_MANIFEST_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT,
+                foldername TEXT,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_files_hash ON files(content_hash);
+            CREATE TABLE IF NOT EXISTS name_tokens (
+                token TEXT NOT NULL,
+                path TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_name_tokens_token ON name_tokens(token);
+            CREATE INDEX IF NOT EXISTS idx_name_tokens_path ON name_tokens(path);
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def changed_files(self, file_paths, snapshot=None):
+        """매니페스트에 없거나 크기/수정시간이 달라졌거나 배정 폴더가 없는(분류 실패) 파일만 반환"""
+        changed = []
+        for path in file_paths:
+            try:
+                st = stat_record(path, snapshot)
+            except OSError:
+                continue
+            row = self.conn.execute(
+                "SELECT size, mtime_ns FROM files WHERE path = ? AND foldername IS NOT NULL", (os.path.abspath(path),)
+            ).fetchone()
+            if row != (st.st_size, st.st_mtime_ns):
+                changed.append(path)
+        return changed
+
+    def folder_for_hash(self, content_hash):
+        row = self.conn.execute(
+            "SELECT foldername FROM files WHERE content_hash = ? AND foldername IS NOT NULL "
+            "ORDER BY updated DESC LIMIT 1", (content_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def related_folder(self, filename, threshold=0.5):
+        """파일명 토큰의 자카드 유사도가 threshold 이상인 기존 파일 중 가장 비슷한 것의 폴더"""
+        tokens = _name_tokens(filename)
+        if not tokens:
+            return None
+        placeholders = ",".join("?" * len(tokens))
+        usable = [
+            token for token, count in self.conn.execute(
+                f"SELECT token, COUNT(*) FROM name_tokens WHERE token IN ({placeholders}) GROUP BY token",
+                tuple(tokens),
+            ) if count <= MAX_TOKEN_POSTINGS
+        ]
+        if not usable:
+            return None
+        placeholders = ",".join("?" * len(usable))
+        best_folder, best_score = None, threshold
+        for path, foldername in self.conn.execute(
+            f"SELECT DISTINCT f.path, f.foldername FROM name_tokens t JOIN files f ON f.path = t.path "
+            f"WHERE t.token IN ({placeholders}) AND f.foldername IS NOT NULL",
+            tuple(usable),
+        ):
+            other = _name_tokens(os.path.basename(path))
+            score = len(tokens & other) / len(tokens | other)
+            if score >= best_score:
+                best_folder, best_score = foldername, score
+        return best_folder
+
+    def reuse_decisions(self, file_paths):
+        """내용이 같거나 이름이 비슷한 파일의 이전 폴더를 재사용.
+        ({경로: 폴더명}, {경로: 내용 해시}) 반환"""
+        reused = {}
+        hashes = {}
+        for path in file_paths:
+            try:
+                hashes[path] = file_sha256(path)
+            except OSError as e:
+                print(f"Error hashing {path}: {e}")
+                continue
+            foldername = self.folder_for_hash(hashes[path]) or self.related_folder(os.path.basename(path))
+            if foldername:
+                reused[path] = foldername
+        return reused, hashes
+
+    def record(self, path, foldername, content_hash=None, snapshot=None):
+        """파일을 옮기기 전에 호출해야 원래 위치의 stat이 기록됨"""
+        st = stat_record(path, snapshot)
+        abs_path = os.path.abspath(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, foldername, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (abs_path, st.st_size, st.st_mtime_ns, content_hash, foldername, time.time()),
+        )
+        self.conn.execute("DELETE FROM name_tokens WHERE path = ?", (abs_path,))
+        self.conn.executemany(
+            "INSERT INTO name_tokens (token, path) VALUES (?, ?)",
+            [(token, abs_path) for token in _name_tokens(os.path.basename(path))],
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
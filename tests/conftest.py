@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 저장소 최상위의 모듈(main.py 등)을 테스트에서 바로 import할 수 있게 함
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,167 @@
+import os
+import sys
+import types
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from embedding_classifier import (
+    EmbeddingClassifier, FILENAME_KIND, CONTENT_KIND, CONTENT_ROUTE_BATCH, MIN_FOLDER_EXAMPLES,
+)
+
+class FakeEncoder:
+    """단어마다 고유한 축을 주는 bag-of-words 인코더 (유사도를 손으로 계산할 수 있게)"""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+        self.vocab = {}
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=None, normalize_embeddings=True, convert_to_numpy=True,
+               show_progress_bar=False):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, self.vocab.setdefault(word, len(self.vocab))] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+@pytest.fixture
+def encoder():
+    return FakeEncoder()
+
+@pytest.fixture
+def classifier(tmp_path, encoder):
+    with EmbeddingClassifier(db_path=str(tmp_path / "embeddings.sqlite3"), encoder=encoder) as clf:
+        yield clf
+
+def test_confident_match_is_assigned(classifier):
+    classifier.learn(["A", "A", "B", "B"], ["alpha beta", "alpha gamma", "delta epsilon", "delta zeta"])
+    # (1,1,1)/√3 · (2,1,1)/√6 ≈ 0.94, 두 번째 폴더와는 0
+    (folder, score), = classifier.classify(["alpha beta gamma"])
+    assert folder == "A"
+    assert score == pytest.approx(4 / 18 ** 0.5, abs=1e-5)
+
+def test_below_threshold_is_left_for_llm(classifier):
+    classifier.learn(["A", "A", "B", "B"], ["alpha beta", "alpha gamma", "delta epsilon", "delta zeta"])
+    assert classifier.classify(["omega"]) == [(None, 0.0)]
+
+def test_ambiguous_match_fails_margin(tmp_path, encoder):
+    with EmbeddingClassifier(db_path=str(tmp_path / "e.sqlite3"), encoder=encoder, threshold=0.5) as clf:
+        clf.learn(["A", "A", "C", "C"], ["alpha beta", "alpha beta", "alpha gamma", "alpha gamma"])
+        (folder, score), = clf.classify(["alpha"])
+    assert score >= 0.5
+    assert folder is None
+
+def test_folders_with_too_few_examples_are_ignored(classifier):
+    classifier.learn(["A"] * MIN_FOLDER_EXAMPLES + ["D"], ["alpha beta"] * MIN_FOLDER_EXAMPLES + ["omega"])
+    assert classifier.classify(["omega"])[0][0] is None
+    classifier.learn(["D"], ["omega"])
+    assert classifier.classify(["omega"])[0][0] == "D"
+
+def test_centroids_are_kept_per_kind(classifier):
+    classifier.learn(["A", "A"], ["alpha beta", "alpha gamma"], FILENAME_KIND)
+    assert classifier.classify(["alpha beta"], CONTENT_KIND)[0][0] is None
+    assert classifier.classify(["alpha beta"], FILENAME_KIND)[0][0] == "A"
+
+def test_embeddings_are_encoded_once_and_cached(tmp_path, encoder):
+    db_path = str(tmp_path / "e.sqlite3")
+    with EmbeddingClassifier(db_path=db_path, encoder=encoder) as clf:
+        clf.embed(["alpha", "beta", "alpha"])
+        clf.embed(["alpha", "beta"])
+    with EmbeddingClassifier(db_path=db_path, encoder=encoder) as clf:
+        clf.embed(["beta", "gamma"])
+    assert encoder.calls == [["alpha", "beta"], ["gamma"]]
+
+def test_classify_files_batches_content_and_learns_only_llm_results(tmp_path, monkeypatch, encoder):
+    pytest.importorskip("rich")
+    import main
+    import text_extraction
+    monkeypatch.setattr(text_extraction, "TEXT_CACHE_DIR", str(tmp_path / "text_cache"))
+
+    clf = EmbeddingClassifier(db_path=str(tmp_path / "e.sqlite3"), encoder=encoder)
+    clf.learn(["A", "A"], ["alpha beta", "alpha gamma"], FILENAME_KIND)
+    clf.learn(["B", "B"], ["delta epsilon", "delta zeta"], CONTENT_KIND)
+
+    paths = [str(tmp_path / "alpha_beta_gamma.txt")]
+    for i in range(CONTENT_ROUTE_BATCH + 1):
+        paths.append(str(tmp_path / f"memo{i}.txt"))
+    for path in paths[1:]:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("delta delta epsilon zeta" if path.endswith("memo0.txt") else "omega")
+
+    class NoExamples:
+        def __enter__(self):
+            return None
+
+        def __exit__(self, *exc):
+            pass
+
+    def fake_bulk(file_paths, model, **kwargs):
+        return [{"file_path": path, "foldername": None} for path in file_paths]
+
+    def fake_llm(pairs, model, **kwargs):
+        for path, _ in pairs:
+            yield {"file_path": path, "foldername": "L"}
+
+    monkeypatch.setattr(main, "initialize_embeddings", lambda output_path=None: clf)
+    monkeypatch.setattr(main, "initialize_models", lambda: None)
+    monkeypatch.setattr(main, "ExampleStore", lambda **kwargs: NoExamples())
+    monkeypatch.setattr(main, "classify_filenames_bulk", fake_bulk)
+    monkeypatch.setattr(main, "process_text_stream", fake_llm)
+    learned = []
+    original_learn = clf.learn
+    monkeypatch.setattr(clf, "learn", lambda folders, texts, kind=FILENAME_KIND: (
+        learned.append((kind, list(folders))), original_learn(folders, texts, kind)))
+
+    classified = main.classify_files(paths, log_file=None, extract_processes=False, extract_workers=2,
+                                     use_embeddings=True)
+    clf.close()
+
+    folders = {os.path.basename(item["file_path"]): item["foldername"] for item in classified}
+    assert folders["alpha_beta_gamma.txt"] == "A"
+    assert folders["memo0.txt"] == "B"
+    assert all(folders[f"memo{i}.txt"] == "L" for i in range(1, CONTENT_ROUTE_BATCH + 1))
+    # 내용 임베딩은 문서마다가 아니라 CONTENT_ROUTE_BATCH개씩 계산
+    content_calls = [call for call in encoder.calls if any("\n" in text for text in call)]
+    assert len(content_calls) == 2
+    # 임베딩이 스스로 배정한 A/B는 중심 학습에 쓰지 않음
+    assert learned == [(FILENAME_KIND, ["L"] * CONTENT_ROUTE_BATCH), (CONTENT_KIND, ["L"] * CONTENT_ROUTE_BATCH)]
+
+def test_model_is_loaded_from_local_cache_only(tmp_path, monkeypatch, encoder):
+    calls = []
+
+    def fake_sentence_transformer(model_name, **kwargs):
+        calls.append(kwargs)
+        return encoder
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(SentenceTransformer=fake_sentence_transformer))
+    EmbeddingClassifier(db_path=str(tmp_path / "e.sqlite3")).close()
+    assert calls == [{"device": "cpu", "local_files_only": True}]
+
+def test_missing_local_model_falls_back_to_llm_without_download(monkeypatch):
+    pytest.importorskip("rich")
+    import main
+
+    def not_cached():
+        raise OSError("model not found in local cache")
+
+    monkeypatch.setattr(main, "embedding_classifier", None)
+    monkeypatch.setattr(main, "embeddings_available", lambda: True)
+    monkeypatch.setattr(main, "EmbeddingClassifier", not_cached)
+    assert main.initialize_embeddings() is None
+
+def test_embeddings_are_not_loaded_unless_requested(tmp_path, monkeypatch):
+    pytest.importorskip("rich")
+    import main
+    monkeypatch.setattr(main, "initialize_embeddings", lambda output_path=None: pytest.fail("embeddings loaded"))
+    monkeypatch.setattr(main, "initialize_models", lambda: None)
+    monkeypatch.setattr(main, "classify_filenames_bulk",
+                        lambda file_paths, model, **kwargs: [{"file_path": p, "foldername": "A"} for p in file_paths])
+    path = str(tmp_path / "report.txt")
+    assert main.classify_files([path], log_file=None, extract_processes=False)[0]["foldername"] == "A"
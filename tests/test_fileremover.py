@@ -0,0 +1,58 @@
+import pytest
+import fileremover
+import text_extraction
+from near_duplicate import NUM_PERM
+
+LONG_TEXT = " ".join(f"항목 {i}: 분기별 예산 집행 현황과 다음 분기 계획을 정리한 문단입니다." for i in range(40))
+
+@pytest.fixture(autouse=True)
+def isolated_text_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_extraction, "TEXT_CACHE_DIR", str(tmp_path / "text_cache"))
+    text_extraction.clear_memory_cache()
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def _graph_with_signatures(monkeypatch, signatures):
+    monkeypatch.setattr(fileremover, "content_signatures", lambda paths, **kwargs: dict(signatures))
+    return fileremover.build_content_similarity_graph(list(signatures))
+
+def test_colliding_signature_alone_does_not_link_unrelated_files(tmp_path, monkeypatch):
+    meeting = _write(tmp_path, "meeting.txt", "3월 정기 회의록 초안")
+    lunch = _write(tmp_path, "lunch.txt", "점심 메뉴 추천 목록")
+    # 서명이 완전히 같아도(LSH 후보) 실제 텍스트가 다르면 연결하지 않음
+    graph = _graph_with_signatures(monkeypatch, {meeting: [7] * NUM_PERM, lunch: [7] * NUM_PERM})
+    assert graph == {meeting: set(), lunch: set()}
+    assert all(len(cluster) == 1 for cluster in fileremover.build_similarity_clusters(graph))
+
+def test_colliding_candidates_are_linked_when_text_matches(tmp_path, monkeypatch):
+    draft = _write(tmp_path, "budget.txt", LONG_TEXT)
+    renamed = _write(tmp_path, "final copy.txt", LONG_TEXT.replace("항목 3:", "항목 3 (수정):"))
+    graph = _graph_with_signatures(monkeypatch, {draft: [7] * NUM_PERM, renamed: [7] * NUM_PERM})
+    assert graph[draft] == {renamed}
+
+def test_same_filename_group_is_compared_without_lsh_hit(tmp_path, monkeypatch):
+    # 예전 규칙(같은 파일명 그룹 + 유사도 0.85 이상)으로 묶이던 쌍은 서명이 겹치지 않아도 계속 묶임
+    v1 = _write(tmp_path, "report_v1.txt", LONG_TEXT)
+    v2 = _write(tmp_path, "report_v2.txt", LONG_TEXT.replace("정리한", "새로 정리한"))
+    graph = _graph_with_signatures(monkeypatch, {v1: list(range(NUM_PERM)),
+                                                 v2: list(range(1000, 1000 + NUM_PERM))})
+    assert graph[v1] == {v2}
+
+def test_unsupported_files_skip_extraction_pool(tmp_path, monkeypatch):
+    binary = str(tmp_path / "archive.bin")
+    with open(binary, "wb") as f:
+        f.write(b"\0" * 16)
+    submitted = []
+
+    def fake_pool(paths, **kwargs):
+        submitted.extend(paths)
+        return iter(())
+
+    monkeypatch.setattr(fileremover, "iter_read_files_parallel", fake_pool)
+    text = _write(tmp_path, "notes.txt", "메모")
+    signatures = fileremover.content_signatures([binary, text])
+    assert signatures[binary] is None
+    assert submitted == [text]
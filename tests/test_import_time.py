@@ -0,0 +1,40 @@
+import os
+import sys
+import subprocess
+import pytest
+from conftest import ROOT
+
+# main을 import하는 것만으로 불러오면 안 되는 무거운 모듈 (실제로 쓰는 리더/모델 안에서만 import해야 함)
+HEAVY_MODULES = {
+    "fitz", "pandas", "openpyxl", "xlrd", "docx", "pptx", "bs4", "PIL", "pytesseract",
+    "nltk", "numpy", "torch", "sentence_transformers", "nexa",
+}
+# 가벼운 모듈만 불러오므로 이보다 오래 걸리면 무언가 무거운 것이 딸려 들어온 것
+IMPORT_BUDGET_SECONDS = 1.0
+
+def _import_main():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        if "ModuleNotFoundError" in result.stderr:
+            pytest.skip(f"main의 의존성이 설치되어 있지 않음: {result.stderr.strip().splitlines()[-1]}")
+        pytest.fail(result.stderr)
+    # 형식: "import time: self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+def test_import_main_skips_heavy_modules():
+    timings = _import_main()
+    loaded = {name.split(".")[0] for name in timings} & HEAVY_MODULES
+    assert not loaded, f"main import 시 무거운 모듈을 불러옴: {sorted(loaded)}"
+
+def test_import_main_within_budget():
+    timings = _import_main()
+    assert timings["main"] / 1e6 < IMPORT_BUDGET_SECONDS
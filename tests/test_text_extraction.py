@@ -0,0 +1,56 @@
+import os
+import time
+import pytest
+import text_extraction
+from hash_cache import file_sha256
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "text_cache"
+    monkeypatch.setattr(text_extraction, "TEXT_CACHE_DIR", str(path))
+    text_extraction.clear_memory_cache()
+    return path
+
+def _cached_document(tmp_path, name, text, age):
+    """텍스트를 추출해 디스크 캐시에 넣고, 캐시 항목의 마지막 사용 시각을 age초 전으로 돌려둠"""
+    source = tmp_path / name
+    source.write_text(text, encoding="utf-8")
+    assert text_extraction.extract_text(str(source)) == text
+    entry = text_extraction._disk_cache_path(file_sha256(str(source)))
+    past = time.time() - age
+    os.utime(entry, (past, past))
+    return source, entry
+
+def test_prune_drops_least_recently_used_entries_over_size_limit(tmp_path, cache_dir):
+    _, oldest = _cached_document(tmp_path, "a.txt", "가" * 5000, age=300)
+    _, middle = _cached_document(tmp_path, "b.txt", "나" * 5000, age=200)
+    _, newest = _cached_document(tmp_path, "c.txt", "다" * 5000, age=100)
+    limit = os.path.getsize(middle) + os.path.getsize(newest)
+    assert text_extraction.prune_text_cache(max_bytes=limit) == 1
+    assert not os.path.exists(oldest)
+    assert os.path.exists(middle) and os.path.exists(newest)
+
+def test_disk_hit_refreshes_entry_before_pruning(tmp_path, cache_dir):
+    source, entry = _cached_document(tmp_path, "a.txt", "오래된 문서", age=10 * 24 * 3600)
+    text_extraction.clear_memory_cache()
+    assert text_extraction.extract_text(str(source)) == "오래된 문서"
+    text_extraction.prune_text_cache(max_age=24 * 3600)
+    assert os.path.exists(entry)
+
+def test_prune_drops_stale_and_other_version_entries(tmp_path, cache_dir):
+    _, stale = _cached_document(tmp_path, "a.txt", "수정 전 내용", age=10 * 24 * 3600)
+    _, fresh = _cached_document(tmp_path, "b.txt", "지금 내용", age=0)
+    other_version = os.path.join(os.path.dirname(fresh), "0" * 64 + "-v0.txt.gz")
+    with open(other_version, "wb"):
+        pass
+    assert text_extraction.prune_text_cache(max_age=24 * 3600) == 2
+    assert not os.path.exists(stale) and not os.path.exists(other_version)
+    assert os.path.exists(fresh)
+
+def test_writes_prune_at_most_once_per_interval(tmp_path, cache_dir, monkeypatch):
+    calls = []
+    monkeypatch.setattr(text_extraction, "prune_text_cache", lambda: calls.append(1))
+    for i in range(3):
+        (tmp_path / f"{i}.txt").write_text(f"문서 {i}", encoding="utf-8")
+        text_extraction.extract_text(str(tmp_path / f"{i}.txt"))
+    assert calls == [1]
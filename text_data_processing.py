@@ -1,18 +1,10 @@
 import re
 import os
+import json
 import time
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.probability import FreqDist
-from nltk.stem import WordNetLemmatizer
 from rich.progress import Progress, TextColumn, BarColumn, TimeElapsedColumn
 from data_processing_common import sanitize_filename
-
-# 필요한 nltk 리소스 다운로드
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
-nltk.download('wordnet', quiet=True)
+from log_writer import log_event
 
 # ✅ 제목/첫 문단만 추출
 
@@ -48,8 +40,8 @@ def process_single_text_file(args, text_inference, silent=False, log_file=None):
     end_time = time.time()
     message = f"File: {file_path}\nTime taken: {end_time - start_time:.2f} seconds\nDescription: {description}\nFolder name: {foldername}\nGenerated filename: {filename}\n"
     if silent and log_file:
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(message + '\n')
+        log_event(log_file, "content_classified", file=os.path.basename(file_path), path=file_path, folder=foldername, filename=filename,
+                  description=description, seconds=round(end_time - start_time, 2))
     elif not silent:
         print(message)
     return {
@@ -59,14 +51,70 @@ def process_single_text_file(args, text_inference, silent=False, log_file=None):
         'description': description
     }
 
-def process_text_files(text_tuples, text_inference, silent=False, log_file=None):
-    results = []
+def process_text_stream(text_tuples, text_inference, silent=False, log_file=None):
+    """(파일 경로, 텍스트)를 받는 대로 추론해 결과를 하나씩 내보냄 (입력은 제너레이터여도 됨)"""
     for args in text_tuples:
-        data = process_single_text_file(args, text_inference, silent=silent, log_file=log_file)
-        results.append(data)
-    return results
+        yield process_single_text_file(args, text_inference, silent=silent, log_file=log_file)
+
+def process_text_files(text_tuples, text_inference, silent=False, log_file=None):
+    return list(process_text_stream(text_tuples, text_inference, silent=silent, log_file=log_file))
+
+def _finalize_metadata(foldername, filename, filename_ko, description):
+    if not foldername or len(foldername) < 2 or len(foldername) > 20:
+        foldername = '기타'
+    return foldername, filename or filename_ko, description
+
+def parse_structured_metadata(raw_text):
+    """응답에서 JSON 객체를 찾아 (요약, 파일명, 폴더명) 반환. 형식이 맞지 않으면 None"""
+    match = re.search(r'\{.*\}', raw_text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    values = [data.get(key) for key in ("summary", "filename", "folder")]
+    if not all(isinstance(value, str) and value.strip() for value in values):
+        return None
+    return tuple(value.strip() for value in values)
 
 def generate_text_metadata(text, file_path, progress, task_id, text_inference):
+    """요약/파일명/폴더명을 JSON 형식의 한 번의 호출로 생성. 파싱에 실패하면 세 번 호출 방식으로 대체"""
+    filename_ko = os.path.splitext(os.path.basename(file_path))[0]
+    title_or_intro = extract_title_or_intro(text)[:1500]
+    prompt = f"""
+다음 파일명과 글 내용을 보고 아래 세 가지를 만들어주세요.
+
+1. summary: 글의 주제 요약 (최대 2문장)
+2. filename: 간결하고 명확한 한글 파일명 (3단어 이내, "문서", "파일" 같은 일반적인 단어는 피하기)
+3. folder: 문서가 들어갈 주제 폴더명 (반드시 2단어 이내의 한국어 '주제명', 예: 데이터 정규화, 자기 개발, 알고리즘)
+
+기존 파일명: {filename_ko}
+
+내용:
+{title_or_intro}
+
+설명 없이 아래 JSON 형식 한 줄로만 출력하세요:
+{{"summary": "...", "filename": "...", "folder": "..."}}
+"""
+    try:
+        response = text_inference.create_completion(prompt)
+        parsed = parse_structured_metadata(response['choices'][0]['text'])
+    except Exception:
+        parsed = None
+    if parsed is None:
+        return generate_text_metadata_sequential(text, file_path, progress, task_id, text_inference)
+
+    description, raw_filename, raw_folder = parsed
+    filename = sanitize_filename(raw_filename, max_words=3)
+    foldername = sanitize_filename(raw_folder, max_words=2)
+    progress.update(task_id, advance=1.0)
+    return _finalize_metadata(foldername, filename, filename_ko, description)
+
+def generate_text_metadata_sequential(text, file_path, progress, task_id, text_inference):
+    """요약 → 파일명 → 폴더명을 세 번의 호출로 차례로 생성 (구조화 응답 파싱 실패 시 사용)"""
     total_steps = 3
     filename_ko = os.path.splitext(os.path.basename(file_path))[0]
 
@@ -104,7 +152,4 @@ def generate_text_metadata(text, file_path, progress, task_id, text_inference):
     foldername = sanitize_filename(raw_folder, max_words=2)
     progress.update(task_id, advance=1 / total_steps)
 
-    if not foldername or len(foldername) < 2 or len(foldername) > 20:
-        foldername = '기타'
-
-    return foldername, filename or filename_ko, description
+    return _finalize_metadata(foldername, filename, filename_ko, description)
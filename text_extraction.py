@@ -0,0 +1,314 @@
+import os
+import time
+import gzip
+import json
+import zipfile
+import posixpath
+import threading
+from collections import OrderedDict
+from xml.etree import ElementTree
+from hash_cache import CACHE_DIR, cached_file_sha256
+from legacy_converter import convert_legacy_file
+
+# ✅ 파일 내용 해시 기준 추출 텍스트 디스크 캐시 위치
+TEXT_CACHE_DIR = os.path.join(CACHE_DIR, "text_cache")
+# 백엔드/추출 방식이 바뀌면 올려서 기존 디스크 캐시를 무효화
+EXTRACTOR_VERSION = 2
+MEMORY_CACHE_SIZE = 256
+# 디스크 캐시 상한. 내용 해시로 저장하므로 파일을 고칠 때마다 예전 항목이 남음 → 크기/나이로 정리
+TEXT_CACHE_MAX_BYTES = 1024 ** 3
+TEXT_CACHE_MAX_AGE = 90 * 24 * 3600
+# 정리는 이 간격마다 한 번만 (여러 프로세스가 함께 쓰므로 마지막 정리 시각을 표시 파일로 공유)
+TEXT_CACHE_PRUNE_INTERVAL = 3600
+_PRUNE_MARKER = ".last_prune"
+
+# 📄 확장자별 추출 백엔드 (형식마다 가장 빠른 라이브러리 사용)
+# PyMuPDF/pandas 같은 무거운 라이브러리는 각 리더 안에서 처음 쓸 때 import하므로,
+# 입력에 없는 형식의 라이브러리는 아예 불러오지 않음
+BACKENDS = {}
+# 등록된 확장자의 실시간 보기 (나중에 register_reader로 추가한 형식도 포함)
+SUPPORTED_EXTENSIONS = BACKENDS.keys()
+
+def register_reader(*extensions):
+    """reader(path, max_chars=None)를 확장자에 등록하는 데코레이터. 다른 모듈에서 형식을 추가할 때도 사용"""
+    def decorator(reader):
+        for ext in extensions:
+            BACKENDS[ext.lower()] = reader
+        return reader
+    return decorator
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+def join_limited(pieces, max_chars=None, sep="\n"):
+    """조각들을 sep로 이어 붙이되 max_chars에 닿으면 더 읽지 않고 멈춤 (pieces는 지연 생성 가능)"""
+    parts = []
+    total = 0
+    for piece in pieces:
+        parts.append(piece)
+        total += len(piece) + len(sep)
+        if max_chars is not None and total >= max_chars:
+            break
+    text = sep.join(parts)
+    return text if max_chars is None else text[:max_chars]
+
+def _iter_xml_paragraphs(stream, paragraph_tag, text_tag):
+    """OOXML 파트를 스트리밍 파싱해 문단 텍스트를 하나씩 내보냄 (다 읽은 요소는 바로 비움)"""
+    texts = []
+    for _, elem in ElementTree.iterparse(stream, events=("end",)):
+        if elem.tag == text_tag:
+            texts.append(elem.text or "")
+        elif elem.tag == paragraph_tag:
+            yield "".join(texts)
+            texts = []
+            elem.clear()
+
+def _pptx_slide_parts(archive):
+    """presentation.xml의 슬라이드 순서대로 슬라이드 파트 경로를 반환"""
+    rels = ElementTree.fromstring(archive.read("ppt/_rels/presentation.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_REL_NS}Relationship")}
+    presentation = ElementTree.fromstring(archive.read("ppt/presentation.xml"))
+    parts = []
+    for slide_id in presentation.iter(f"{_P_NS}sldId"):
+        target = targets.get(slide_id.get(_R_ID))
+        if not target:
+            continue
+        if target.startswith("/"):
+            parts.append(target.lstrip("/"))
+        else:
+            parts.append(posixpath.normpath(posixpath.join("ppt", target)))
+    return parts
+
+@register_reader(".txt", ".md", ".csv")
+def read_plain_text(path, max_chars=None):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read() if max_chars is None else f.read(max_chars)
+
+@register_reader(".docx")
+def read_docx(path, max_chars=None):
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as stream:
+        return join_limited(_iter_xml_paragraphs(stream, f"{_W_NS}p", f"{_W_NS}t"), max_chars)
+
+# PyMuPDF는 스레드 안전하지 않으므로 한 프로세스 안에서는 PDF를 한 번에 하나씩만 읽음
+# (스레드로 추출하는 pipeline/watch 경로용. 프로세스 풀에서는 프로세스마다 따로 잠금)
+_fitz_lock = threading.Lock()
+
+@register_reader(".pdf")
+def read_pdf(path, max_chars=None):
+    import fitz  # PyMuPDF
+    with _fitz_lock, fitz.open(path) as doc:
+        return join_limited((page.get_text() for page in doc), max_chars)
+
+@register_reader(".xlsx")
+def read_xlsx(path, max_chars=None):
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return join_limited(
+            (str(value) for sheet in wb.worksheets for row in sheet.iter_rows(values_only=True) for value in row if value),
+            max_chars,
+        )
+    finally:
+        wb.close()
+
+@register_reader(".xls")
+def read_xls(path, max_chars=None):
+    import pandas as pd
+    # 값이 있는 셀은 최소 두 글자(값 + 줄바꿈)를 차지하므로 시트당 max_chars행이면 충분함
+    sheets = pd.read_excel(path, sheet_name=None, header=None, nrows=max_chars)
+    return join_limited(
+        (str(value) for df in sheets.values() for value in df.to_numpy().ravel() if pd.notna(value) and value != ""),
+        max_chars,
+    )
+
+@register_reader(".pptx")
+def read_pptx(path, max_chars=None):
+    def paragraphs(archive):
+        for part in _pptx_slide_parts(archive):
+            with archive.open(part) as stream:
+                yield from _iter_xml_paragraphs(stream, f"{_A_NS}p", f"{_A_NS}t")
+    with zipfile.ZipFile(path) as archive:
+        return join_limited(paragraphs(archive), max_chars)
+
+@register_reader(".html")
+def read_html(path, max_chars=None):
+    from bs4 import BeautifulSoup
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = BeautifulSoup(f, "html.parser").get_text()
+    return text if max_chars is None else text[:max_chars]
+
+@register_reader(".json")
+def read_json(path, max_chars=None):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = json.dumps(json.load(f), indent=2)
+    return text if max_chars is None else text[:max_chars]
+
+@register_reader(".doc", ".ppt")
+def read_legacy_office(path, max_chars=None):
+    """.doc/.ppt는 LibreOffice로 변환된 사본(변환 캐시)에서 읽음.
+    여러 파일을 다룰 땐 convert_legacy_files로 미리 일괄 변환해두면 여기선 캐시만 확인함"""
+    converted = convert_legacy_file(path)
+    if not converted:
+        # 변환 실패는 캐시하지 않도록 예외로 넘김
+        raise OSError(f"LibreOffice conversion failed: {path}")
+    return BACKENDS[os.path.splitext(converted)[1]](converted, max_chars)
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+def _memory_get(key):
+    with _memory_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+    return None
+
+def _memory_put(key, value):
+    with _memory_lock:
+        _memory_cache[key] = value
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+def clear_memory_cache():
+    with _memory_lock:
+        _memory_cache.clear()
+
+def _covers(limit, max_chars):
+    """limit 글자까지 읽어둔 캐시가 max_chars 요청을 채울 수 있는지 (limit=None은 전체 텍스트)"""
+    return limit is None or (max_chars is not None and max_chars <= limit)
+
+def _disk_cache_path(content_hash):
+    return os.path.join(TEXT_CACHE_DIR, content_hash[:2], f"{content_hash}-v{EXTRACTOR_VERSION}.txt.gz")
+
+def _disk_get(content_hash):
+    """(텍스트, 읽은 글자 한도) 반환. 첫 줄은 "complete" 또는 "limit:<글자 수>" 헤더"""
+    path = _disk_cache_path(content_hash)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            header = f.readline().rstrip("\n")
+            text = f.read()
+        # 정리할 때 최근에 쓴 항목을 남기도록 수정 시각을 사용 시각으로 갱신
+        os.utime(path)
+    except (OSError, EOFError):
+        return None
+    if header == "complete":
+        return text, None
+    if header.startswith("limit:"):
+        return text, int(header[len("limit:"):])
+    return None
+
+def _disk_put(content_hash, text, limit):
+    path = _disk_cache_path(content_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+            f.write("complete\n" if limit is None else f"limit:{limit}\n")
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error writing text cache for {content_hash}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _maybe_prune_text_cache()
+
+def prune_text_cache(max_bytes=TEXT_CACHE_MAX_BYTES, max_age=TEXT_CACHE_MAX_AGE):
+    """디스크 텍스트 캐시에서 max_age초 넘게 쓰지 않은 항목, 다른 EXTRACTOR_VERSION 항목, 남은 임시 파일을
+    지우고, 그래도 max_bytes를 넘으면 오래 쓰지 않은 것부터 지움. 지운 파일 수 반환"""
+    now = time.time()
+    suffix = f"-v{EXTRACTOR_VERSION}.txt.gz"
+    entries = []
+    removed = 0
+    try:
+        shards = [entry.path for entry in os.scandir(TEXT_CACHE_DIR) if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return 0
+    for shard in shards:
+        try:
+            with os.scandir(shard) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                        if not entry.name.endswith(suffix) or now - st.st_mtime > max_age:
+                            # 임시 파일은 다른 프로세스가 쓰는 중일 수 있으므로 오래된 것만 지움
+                            if not entry.name.endswith(".tmp") or now - st.st_mtime > TEXT_CACHE_PRUNE_INTERVAL:
+                                os.remove(entry.path)
+                                removed += 1
+                        else:
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+def _maybe_prune_text_cache():
+    marker = os.path.join(TEXT_CACHE_DIR, _PRUNE_MARKER)
+    try:
+        if time.time() - os.path.getmtime(marker) < TEXT_CACHE_PRUNE_INTERVAL:
+            return
+    except OSError:
+        pass
+    try:
+        with open(marker, "w"):
+            pass
+    except OSError:
+        return
+    prune_text_cache()
+
+def extract_text(path, max_chars=None, use_disk_cache=True):
+    """파일 텍스트를 추출. 같은 파일은 실행 중엔 메모리 LRU에서, 실행 간엔
+    내용 해시 기준 디스크 캐시에서 가져오므로 파일이 바뀌지 않는 한 한 번만 파싱함.
+
+    max_chars를 주면 각 리더가 그만큼만 읽고 멈추므로 메모리 사용량이 파일 크기가 아닌
+    글자 수 한도에 비례함. 캐시는 얼마나 읽었는지를 함께 기록해서, 더 큰 한도로 이미 읽어둔
+    텍스트가 있으면 다시 파싱하지 않음.
+    지원하지 않는 형식이거나 파싱에 실패하면 빈 문자열 반환"""
+    ext = os.path.splitext(path)[1].lower()
+    backend = BACKENDS.get(ext)
+    if backend is None:
+        return ""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    memory_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    cached = _memory_get(memory_key)
+    if cached is not None and _covers(cached[1], max_chars):
+        return cached[0][:max_chars]
+
+    content_hash = None
+    if use_disk_cache:
+        try:
+            content_hash = cached_file_sha256(path, st)
+        except OSError:
+            return ""
+        cached = _disk_get(content_hash)
+        if cached is not None and _covers(cached[1], max_chars):
+            _memory_put(memory_key, cached)
+            return cached[0][:max_chars]
+
+    try:
+        text = backend(path, max_chars) or ""
+    except Exception:
+        return ""
+    # 한도보다 짧게 끝났으면 파일 전체를 읽은 것
+    limit = max_chars if max_chars is not None and len(text) >= max_chars else None
+    _memory_put(memory_key, (text, limit))
+    if content_hash:
+        _disk_put(content_hash, text, limit)
+    return text
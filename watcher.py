@@ -0,0 +1,114 @@
+import os
+import time
+import queue
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog이 없으면 폴링으로 대체
+    Observer = None
+    FileSystemEventHandler = object
+
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_MAX_BATCH = 50
+
+def _is_hidden(path):
+    return os.path.basename(path).startswith('.')
+
+class _QueueEventHandler(FileSystemEventHandler):
+    """watchdog 이벤트 중 파일 생성/수정/이동(도착 경로)만 큐에 넣음"""
+
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.events.put(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.events.put(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.events.put(event.dest_path)
+
+def _snapshot(base_path):
+    snapshot = {}
+    for root, _, files in os.walk(base_path):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+def _poll_changes(base_path, events, stop_event, interval):
+    """watchdog이 없을 때: interval초마다 디렉터리를 훑어 새로 생기거나 바뀐 파일을 큐에 넣음"""
+    previous = _snapshot(base_path)
+    while not stop_event.wait(interval):
+        current = _snapshot(base_path)
+        for path, signature in current.items():
+            if previous.get(path) != signature:
+                events.put(path)
+        previous = current
+
+def watch_directory(base_path, on_batch, debounce=DEFAULT_DEBOUNCE_SECONDS, max_batch=DEFAULT_MAX_BATCH,
+                    poll_interval=DEFAULT_POLL_INTERVAL, stop_event=None, force_polling=False):
+    """base_path에 새로 생기거나 바뀐 파일을 모아 on_batch(경로 목록)로 넘김 (stop_event가 설정될 때까지 블록).
+
+    Linux에서는 watchdog(inotify)을 쓰고, 설치되어 있지 않으면 폴링으로 대체함. 한 파일에 이벤트가
+    몰려도 debounce초 동안 조용해진 뒤(복사/다운로드 완료)에 한 번만 넘기며, 한 번에 최대 max_batch개.
+    on_batch에서 난 예외는 출력만 하고 다음 배치로 넘어감 (실패한 파일은 다시 바뀌면 재시도됨).
+    """
+    stop_event = stop_event or threading.Event()
+    events = queue.Queue()
+    observer = None
+    if Observer is not None and not force_polling:
+        observer = Observer()
+        observer.schedule(_QueueEventHandler(events), base_path, recursive=True)
+        observer.start()
+        print(f"👀 감시 시작 (inotify/watchdog): {base_path}")
+    else:
+        if Observer is None:
+            print(f"⚠️ watchdog이 설치되어 있지 않아 폴링으로 감시합니다 ({poll_interval}초마다 폴더 전체를 다시 훑음). "
+                  "pip install watchdog")
+        threading.Thread(
+            target=_poll_changes, args=(base_path, events, stop_event, poll_interval),
+            name="watch-poller", daemon=True
+        ).start()
+        print(f"👀 감시 시작 (폴링 {poll_interval}초 간격): {base_path}")
+
+    last_seen = {}
+    try:
+        while not stop_event.is_set():
+            try:
+                path = events.get(timeout=min(debounce, 0.5))
+                while True:
+                    if not _is_hidden(path):
+                        last_seen[path] = time.monotonic()
+                    path = events.get_nowait()
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            ready = [path for path, seen in last_seen.items() if now - seen >= debounce]
+            for path in ready:
+                del last_seen[path]
+            ready = [path for path in ready if os.path.isfile(path)]
+            for start in range(0, len(ready), max_batch):
+                batch = ready[start:start + max_batch]
+                try:
+                    on_batch(batch)
+                except Exception as e:
+                    # 배치 하나가 실패해도(그사이 지워진 파일, 분류 오류 등) 감시는 계속함
+                    print(f"❌ 배치 처리 오류 ({len(batch)}개 파일): {e!r}")
+    finally:
+        stop_event.set()
+        if observer is not None:
+            observer.stop()
+            observer.join()